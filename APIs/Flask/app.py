@@ -1,40 +1,369 @@
+import atexit
+import base64
+import csv
+import functools
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
 from crypt import methods
 from datetime import datetime
 
-from flask import Flask, render_template, request, redirect
+from flask import Flask, Response, abort, jsonify, render_template, request, redirect, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
+
+from profiling import RequestProfiler
+from write_behind import WriteBehindQueue
+
+# SQLite settings by profile: pragmas run on every new connection, engine
+# options configure the connection pool
+SQLITE_PROFILES = {
+    # SQLite's defaults: rollback journal, full fsync and a connection per request
+    "default": {
+        "pragmas": {},
+        "engine_options": {},
+    },
+    # Readers don't block the writer and vice versa, commits only fsync at
+    # checkpoints, and a locked database is retried instead of failing at once
+    "wal": {
+        "pragmas": {
+            "busy_timeout": 5000,  # ms, set first so the switch to WAL waits for other workers
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -64000,  # negative values are KiB, i.e. 64MB
+            "mmap_size": 268435456,  # 256MB
+            "temp_store": "MEMORY",
+        },
+        "engine_options": {
+            "poolclass": QueuePool,
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+            # Pooled connections are handed to whichever thread serves the next request
+            "connect_args": {"check_same_thread": False, "timeout": 5},
+        },
+    },
+}
+
+def configure_database(app: Flask, profile: str) -> None:
+    """Selects the SQLite profile of an app, must run before its first database access"""
+    
+    assert profile in SQLITE_PROFILES, f"{profile} must be one of {list(SQLITE_PROFILES)}."
+    app.config["SQLITE_PROFILE"] = profile
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = dict(SQLITE_PROFILES[profile]["engine_options"])
+
+class PragmaSQLAlchemy(SQLAlchemy):
+    """Applies the pragmas of the app's SQLite profile to every connection of its engine"""
+    
+    def create_engine(self, sa_url, engine_opts):
+        engine = super().create_engine(sa_url, engine_opts)
+        if engine.dialect.name == "sqlite":
+            pragmas = SQLITE_PROFILES[self.get_app().config["SQLITE_PROFILE"]]["pragmas"]
+            event.listen(engine, "connect", functools.partial(apply_sqlite_pragmas, pragmas))
+        return engine
+
+def apply_sqlite_pragmas(pragmas: dict, dbapi_connection, connection_record) -> None:
+    """Applies pragmas to a new SQLite connection"""
+    
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
 
 # Setup the app
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = 'sqlite:///test.db'
-db = SQLAlchemy(app)  # initialize the DB
+configure_database(app, os.environ.get("SQLITE_PROFILE", "wal"))
+db = PragmaSQLAlchemy(app)  # initialize the DB
+
+# Tasks per page of the task list
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Largest number of operations accepted by the bulk API
+app.config.setdefault("BULK_MAX_OPERATIONS", int(os.environ.get("BULK_MAX_OPERATIONS", 1000)))
+
+# Longest task content, matches the column size
+MAX_CONTENT_LENGTH = 200
+
+# Rendered task list pages kept by each worker process
+RENDER_CACHE_ENTRIES = 256
+
+# Matches ranked per search: words found in most tasks are ranked among
+# their newest matches only, as scoring every match grows with the table.
+# Older matches aren't returned, and the results say they were truncated
+SEARCH_RANK_CANDIDATES = 10000
 
-#db.create_all()  # create DB
+# Rows fetched from the database and sent per chunk by the export
+EXPORT_CHUNK_ROWS = 1000
+
+# Write-behind mode: new tasks are queued and inserted in batches of up to
+# WRITE_BEHIND_MAX_ROWS, at most WRITE_BEHIND_MAX_DELAY_MS after they were posted
+app.config.setdefault("WRITE_BEHIND", os.environ.get("WRITE_BEHIND", "0") == "1")
+app.config.setdefault("WRITE_BEHIND_MAX_ROWS", int(os.environ.get("WRITE_BEHIND_MAX_ROWS", 100)))
+app.config.setdefault("WRITE_BEHIND_MAX_DELAY_MS", float(os.environ.get("WRITE_BEHIND_MAX_DELAY_MS", 50)))
+
+# Optional per-request profiling: Server-Timing headers and /_profiling/stats
+app.config.setdefault("PROFILING", os.environ.get("PROFILING", "0") == "1")
+if app.config["PROFILING"]:
+    RequestProfiler(app, db)
 
 class Todo(db.Model):
+    # Backs the (date_created, id) ordering used by the keyset pagination
+    # Autoincrement keeps ids growing even after the newest task is deleted,
+    # the incremental export relies on it (for tables created from now on)
+    __table_args__ = (db.Index("ix_todo_date_created_id", "date_created", "id"), {"sqlite_autoincrement": True})
+    
     id = db.Column(db.Integer, primary_key=True)
-    content = db.Column(db.String(200), nullable=False)
-    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+    content = db.Column(db.String(MAX_CONTENT_LENGTH), nullable=False)
+    date_created = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     def __repr__(self) -> str:
         return f"<Task {self.id}>"
 
+class CacheVersion(db.Model):
+    # Shared by all worker processes, so a write in one of them invalidates the
+    # pages cached by every other
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+
+# FTS5 index of the task content, an external content table that reads the
+# text from todo, kept in sync by triggers
+SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_fts USING fts5(content, content='todo', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS todo_fts_insert AFTER INSERT ON todo BEGIN "
+    "INSERT INTO todo_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_fts_delete AFTER DELETE ON todo BEGIN "
+    "INSERT INTO todo_fts(todo_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_fts_update AFTER UPDATE OF content ON todo BEGIN "
+    "INSERT INTO todo_fts(todo_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO todo_fts(rowid, content) VALUES (new.id, new.content); END",
+]
+
+def init_db() -> None:
+    """Creates the tables and the indexes missing in an existing database"""
+    
+    db.create_all()
+    for index in Todo.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
+    # Tables created before date_created was required can hold NULLs, which
+    # the keyset pagination can't order
+    Todo.query.filter(Todo.date_created.is_(None)).update({Todo.date_created: datetime.utcnow()})
+    db.session.commit()
+    if create_search_index():
+        # Tasks added before the search index existed
+        backfill_search_index()
+    get_list_version()
+
+def create_search_index() -> bool:
+    """Creates the search index and its triggers, returns whether it was missing"""
+    
+    created = not db.inspect(db.engine).has_table("todo_fts")
+    for statement in SEARCH_INDEX_DDL:
+        db.session.execute(db.text(statement))
+    db.session.commit()
+    return created
+
+def backfill_search_index() -> None:
+    """Rebuilds the search index from every task"""
+    
+    db.session.execute(db.text("INSERT INTO todo_fts(todo_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+def bump_list_version() -> None:
+    """Invalidates the cached task list, call it in the transaction changing the tasks"""
+    
+    updated = CacheVersion.query.filter_by(name="tasks").update({CacheVersion.version: CacheVersion.version + 1})
+    if not updated:
+        # Starting from the clock keeps ETags of a recreated database from
+        # matching the ones browsers kept from the previous one
+        db.session.add(CacheVersion(name="tasks", version=time.time_ns() // 1000))
+
+def get_list_version() -> int:
+    """Gets the current version of the task list"""
+    
+    row = db.session.get(CacheVersion, "tasks")
+    if row is None:
+        try:
+            bump_list_version()
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.session.rollback()
+        row = db.session.get(CacheVersion, "tasks")
+    return row.version
+
+class RenderCache:
+    """A per-process LRU of rendered pages keyed by the task list version."""
+    
+    def __init__(self, max_entries: int = RENDER_CACHE_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._pages: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: tuple):
+        """Returns the cached page, None if it isn't cached"""
+        
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return page
+    
+    def put(self, key: tuple, page: bytes) -> None:
+        """Caches a page, pages of older versions simply age out"""
+        
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self._max_entries:
+                self._pages.popitem(last=False)
+
+render_cache = RenderCache()
+
+def insert_tasks(rows: list) -> None:
+    """Inserts a batch of queued tasks in one transaction"""
+    
+    with app.app_context():
+        try:
+            db.session.execute(Todo.__table__.insert(), rows)
+            bump_list_version()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+insert_queue = WriteBehindQueue(
+    insert_tasks, app.config["WRITE_BEHIND_MAX_ROWS"], app.config["WRITE_BEHIND_MAX_DELAY_MS"]
+)
+# Graceful worker shutdowns exit the interpreter normally, which writes the queued tasks
+atexit.register(insert_queue.close)
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Creates or upgrades the database schema."""
+    
+    init_db()
+    print("Database initialized")
+
+@app.cli.command("search-backfill")
+def search_backfill_command():
+    """Indexes every existing task for the search."""
+    
+    create_search_index()
+    backfill_search_index()
+    print(f"Search index rebuilt from {Todo.query.count()} tasks")
+
+def format_date(value: datetime) -> str:
+    """Formats a date for the JSON and CSV APIs, None stays None"""
+    
+    return value.isoformat() if value is not None else None
+
+def encode_cursor(task: Todo) -> str:
+    """Encodes the position of a task in the (date_created, id) ordering"""
+    
+    position = f"{task.date_created.isoformat()}|{task.id}"
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decodes a cursor built by encode_cursor, 400 if it's malformed"""
+    
+    try:
+        date_created, task_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(date_created), int(task_id)
+    except ValueError:
+        abort(400, "Invalid cursor")
+
+def get_tasks_page(after: str = None, before: str = None, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    """Gets a page of tasks ordered by (date_created, id) using keyset pagination
+
+    Instead of an OFFSET, the page starts right after (or ends right before) the
+    cursor of a task, so the database seeks the composite index and the cost of
+    a page doesn't grow with the size of the table.
+
+    Args:
+        after (str, optional): Cursor of the last task of the previous page.
+        before (str, optional): Cursor of the first task of the next page.
+        limit (int, optional): Tasks per page. Defaults to DEFAULT_PAGE_SIZE.
+
+    Returns:
+        dict: The tasks and the cursors of the previous and next pages.
+    """
+    
+    position = db.tuple_(Todo.date_created, Todo.id)
+    query = Todo.query
+    if before:
+        query = query.filter(position < db.tuple_(*decode_cursor(before)))
+        query = query.order_by(Todo.date_created.desc(), Todo.id.desc())
+    else:
+        if after:
+            query = query.filter(position > db.tuple_(*decode_cursor(after)))
+        query = query.order_by(Todo.date_created, Todo.id)
+    
+    # One extra row tells whether there's another page in this direction
+    tasks = query.limit(limit + 1).all()
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    if before:
+        tasks.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+    
+    return {
+        "tasks": tasks,
+        "prev_cursor": encode_cursor(tasks[0]) if tasks and has_prev else None,
+        "next_cursor": encode_cursor(tasks[-1]) if tasks and has_next else None,
+    }
+
 # Create a index route for browing the URL
 @app.route('/', methods=['POST', 'GET'])
 def index():
     if request.method == "POST":
         task_content = request.form["content"]
+        if app.config["WRITE_BEHIND"]:
+            # Timestamped now so the list keeps the order tasks were posted in
+            insert_queue.put({"content": task_content, "date_created": datetime.utcnow()})
+            return redirect('/')
         new_task = Todo(content=task_content)
         
         try:
             db.session.add(new_task)
+            bump_list_version()
             db.session.commit()
             return redirect('/')
         except Exception as e:
             raise e
     else:
-        tasks = Todo.query.order_by(Todo.date_created).all()
-        return render_template("index.html", tasks=tasks)
+        # The version is read before the page, so a cached page is never older than its key
+        version = get_list_version()
+        key = (version, request.full_path)
+        etag = f"{version}-{hashlib.sha256(request.full_path.encode('utf-8')).hexdigest()[:16]}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            body = render_cache.get(key)
+            if body is None:
+                limit = max(1, min(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+                page = get_tasks_page(request.args.get("after"), request.args.get("before"), limit)
+                body = render_template("index.html", limit=limit, **page).encode("utf-8")
+                render_cache.put(key, body)
+            response = Response(body, mimetype="text/html")
+        response.set_etag(etag)
+        # Browsers keep the page but revalidate it on every visit
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
 @app.route("/delete/<int:id>")
 def delete(id):
@@ -42,6 +371,7 @@ def delete(id):
     
     try:
         db.session.delete(task_to_delete)
+        bump_list_version()
         db.session.commit()
         return redirect('/')
     except Exception as e:
@@ -56,6 +386,7 @@ def update(id):
         task.content = request.form["content"]
         
         try:
+            bump_list_version()
             db.session.commit()
             return redirect('/')
         except Exception as e:
@@ -63,5 +394,251 @@ def update(id):
     else:
         return render_template("update.html", task=task)
 
+def validate_operations(operations) -> list:
+    """Checks a list of bulk operations without touching the database
+
+    Returns:
+        list: The errors found, each with the index of its operation.
+    """
+    
+    errors = []
+    seen_ids = set()
+    for i, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            errors.append({"index": i, "error": "Operation must be a JSON object"})
+            continue
+        op = operation.get("op")
+        if op not in ("create", "update", "delete"):
+            errors.append({"index": i, "error": "op must be one of create, update, delete"})
+            continue
+        if op in ("create", "update"):
+            content = operation.get("content")
+            if not isinstance(content, str) or not content.strip():
+                errors.append({"index": i, "error": "content must be a non-empty string"})
+            elif len(content) > MAX_CONTENT_LENGTH:
+                errors.append({"index": i, "error": f"content must be at most {MAX_CONTENT_LENGTH} characters"})
+        if op in ("update", "delete"):
+            task_id = operation.get("id")
+            if not isinstance(task_id, int) or isinstance(task_id, bool):
+                errors.append({"index": i, "error": "id must be an integer"})
+            elif task_id in seen_ids:
+                errors.append({"index": i, "error": f"Task {task_id} is changed more than once"})
+            else:
+                seen_ids.add(task_id)
+    return errors
+
+def missing_task_ids(task_ids: list) -> set:
+    """Returns the ids among task_ids that don't exist"""
+    
+    existing = set()
+    # Stay well below SQLite's limit of bound parameters per statement
+    for first in range(0, len(task_ids), 500):
+        chunk = task_ids[first:first + 500]
+        existing.update(task_id for (task_id,) in db.session.query(Todo.id).filter(Todo.id.in_(chunk)))
+    return set(task_ids) - existing
+
+@app.route("/api/tasks/bulk", methods=["POST"])
+def bulk_tasks():
+    """Applies a list of create, update and delete operations in one transaction
+    
+    The body is a JSON list like ``[{"op": "create", "content": "..."},
+    {"op": "update", "id": 1, "content": "..."}, {"op": "delete", "id": 2}]``.
+    Every operation is validated before any is applied, so the batch either
+    succeeds as a whole or changes nothing.
+    """
+    
+    operations = request.get_json(silent=True)
+    if not isinstance(operations, list):
+        return jsonify({"error": "Body must be a JSON list of operations"}), 400
+    max_operations = app.config["BULK_MAX_OPERATIONS"]
+    if len(operations) > max_operations:
+        return jsonify({"error": f"At most {max_operations} operations per request"}), 413
+    if not operations:
+        # Nothing changes, so the cached pages stay valid
+        return jsonify({"results": []})
+    
+    errors = validate_operations(operations)
+    invalid = {error["index"] for error in errors}
+    changes = [(i, operation["id"]) for i, operation in enumerate(operations) if i not in invalid and operation["op"] != "create"]
+    missing = missing_task_ids([task_id for _, task_id in changes])
+    errors.extend({"index": i, "error": f"Task {task_id} not found"} for i, task_id in changes if task_id in missing)
+    if errors:
+        errors.sort(key=lambda error: error["index"])
+        return jsonify({"errors": errors}), 400
+    
+    creates = [{"content": operation["content"]} for operation in operations if operation["op"] == "create"]
+    updates = [{"id": operation["id"], "content": operation["content"]} for operation in operations if operation["op"] == "update"]
+    deletes = [operation["id"] for operation in operations if operation["op"] == "delete"]
+    try:
+        created_ids = []
+        if creates:
+            # A single executemany, return_defaults would insert row by row to
+            # read back every id
+            db.session.execute(Todo.__table__.insert(), creates)
+            # The transaction holds the write lock since the insert and SQLite
+            # gives new rows ids above every existing one, so the created tasks
+            # are the ones with the largest ids
+            created_ids = db.session.execute(
+                select(Todo.id).order_by(Todo.id.desc()).limit(len(creates))
+            ).scalars().all()[::-1]
+        db.session.bulk_update_mappings(Todo, updates)
+        for first in range(0, len(deletes), 500):
+            Todo.query.filter(Todo.id.in_(deletes[first:first + 500])).delete(synchronize_session=False)
+        bump_list_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    created_ids = iter(created_ids)
+    results = []
+    for i, operation in enumerate(operations):
+        task_id = next(created_ids) if operation["op"] == "create" else operation["id"]
+        results.append({"index": i, "op": operation["op"], "id": task_id, "status": "ok"})
+    return jsonify({"results": results})
+
+def export_chunks(since_id: int, since: datetime, export_format: str):
+    """Yields the tasks after since_id and since, EXPORT_CHUNK_ROWS at a time
+
+    Rows come from a streaming cursor and are serialized chunk by chunk, so
+    memory use doesn't depend on the size of the table.
+    """
+    
+    query = select(Todo.id, Todo.content, Todo.date_created).where(Todo.id > since_id)
+    if since is not None:
+        query = query.where(Todo.date_created >= since)
+    result = db.session.connection().execution_options(stream_results=True).execute(query.order_by(Todo.id))
+    
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["id", "content", "date_created"])
+        for rows in result.partitions(EXPORT_CHUNK_ROWS):
+            writer.writerows((task_id, content, format_date(date_created)) for task_id, content, date_created in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        for rows in result.partitions(EXPORT_CHUNK_ROWS):
+            yield "".join(
+                json.dumps({"id": task_id, "content": content, "date_created": format_date(date_created)}) + "\n"
+                for task_id, content, date_created in rows
+            )
+
+@app.route("/api/tasks/export")
+def export_tasks():
+    """Streams every task as NDJSON (default) or CSV
+    
+    Query args, both optional, limit the export for incremental backups:
+    
+    - ``since``: an ISO date (UTC), exports the tasks created at or after it.
+    - ``since_id``: exports the tasks with a larger id, pass the largest id of
+      the previous export. Ids only grow, unlike creation dates, so tasks
+      inserted late by the write-behind queue are never skipped.
+    
+    ``format`` is ndjson or csv.
+    """
+    
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    since_id = request.args.get("since_id", 0)
+    try:
+        since_id = int(since_id)
+    except ValueError:
+        return jsonify({"error": "since_id must be an integer"}), 400
+    since = request.args.get("since")
+    if since is not None:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({"error": "since must be an ISO date"}), 400
+    
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    response = Response(stream_with_context(export_chunks(since_id, since, export_format)), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=tasks.{export_format}"
+    return response
+
+def build_match_query(text: str) -> str:
+    """Turns free text into an FTS5 query matching tasks with every word
+
+    Words are quoted so FTS5 operators typed by users are searched as text.
+    """
+    
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+def search_tasks(text: str, page: int = 1, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    """Gets a page of the tasks matching a text, best matches first
+
+    Only the newest SEARCH_RANK_CANDIDATES matches are ranked. When a search
+    matches more tasks, the older ones are left out and ``truncated`` is True.
+
+    Args:
+        text (str): The words to search for.
+        page (int, optional): 1-based page number. Defaults to 1.
+        limit (int, optional): Tasks per page. Defaults to DEFAULT_PAGE_SIZE.
+
+    Returns:
+        dict: The tasks, the previous and next page numbers, None at the ends,
+            and whether older matches were left out.
+    """
+    
+    match_query = build_match_query(text)
+    if not match_query:
+        return {"tasks": [], "prev_page": None, "next_page": None, "truncated": False}
+    # Oldest of the candidates and the match after it, if any
+    boundary = db.session.execute(
+        db.text("SELECT rowid FROM todo_fts WHERE todo_fts MATCH :query ORDER BY rowid DESC LIMIT 2 OFFSET :offset"),
+        {"query": match_query, "offset": SEARCH_RANK_CANDIDATES - 1},
+    ).scalars().all()
+    # None when every match is a candidate
+    first_candidate = boundary[0] if boundary else None
+    # A constant rowid bound is resolved by FTS5 itself, so only the candidates
+    # are scored. Lower bm25() is better, the rowid breaks ties
+    rows = db.session.execute(
+        db.text(
+            "SELECT rowid FROM todo_fts WHERE todo_fts MATCH :query AND rowid >= :first_candidate "
+            "ORDER BY bm25(todo_fts), rowid LIMIT :limit OFFSET :offset"
+        ),
+        {"query": match_query, "first_candidate": first_candidate or 0, "limit": limit + 1, "offset": (page - 1) * limit},
+    ).fetchall()
+    task_ids = [task_id for (task_id,) in rows[:limit]]
+    tasks_by_id = {task.id: task for task in Todo.query.filter(Todo.id.in_(task_ids))} if task_ids else {}
+    return {
+        "tasks": [tasks_by_id[task_id] for task_id in task_ids if task_id in tasks_by_id],
+        "prev_page": page - 1 if page > 1 else None,
+        "next_page": page + 1 if len(rows) > limit else None,
+        "truncated": len(boundary) > 1,
+    }
+
+def search_args() -> tuple:
+    """Reads the text, page and page size of a search request"""
+    
+    text = request.args.get("q", "")
+    page = max(1, request.args.get("page", 1, type=int))
+    limit = max(1, min(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    return text, page, limit
+
+@app.route("/search")
+def search():
+    text, page, limit = search_args()
+    results = search_tasks(text, page, limit)
+    return render_template("search.html", q=text, limit=limit, rank_candidates=SEARCH_RANK_CANDIDATES, **results)
+
+@app.route("/api/tasks/search")
+def search_api():
+    """Searches the tasks, returning JSON"""
+    
+    text, page, limit = search_args()
+    results = search_tasks(text, page, limit)
+    results["tasks"] = [
+        {"id": task.id, "content": task.content, "date_created": format_date(task.date_created)}
+        for task in results["tasks"]
+    ]
+    return jsonify(results)
+
 if __name__ == "__main__":
+    init_db()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from app import Todo, app, db, init_db
+from profiling import percentile
+
+# Default share of each operation in the workload
+DEFAULT_MIX = "list=60,update_form=10,create=15,update=10,delete=5"
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parses "operation=weight,..." into a weight by operation"""
+
+    weights = {}
+    for item in mix.split(","):
+        operation, _, weight = item.partition("=")
+        assert operation in OPERATIONS, f"{operation} must be one of {list(OPERATIONS)}."
+        weights[operation] = float(weight)
+    return weights
+
+class TaskIds:
+    """The ids of the existing tasks, shared by the client threads."""
+
+    def __init__(self, ids: List[int]) -> None:
+        self._ids = list(ids)
+        self._lock = threading.Lock()
+
+    def pick(self, rng: random.Random):
+        with self._lock:
+            return rng.choice(self._ids) if self._ids else None
+
+    def take(self, rng: random.Random):
+        """Removes and returns a random id, so two deletes never target the same task"""
+
+        with self._lock:
+            if not self._ids:
+                return None
+            i = rng.randrange(len(self._ids))
+            self._ids[i], self._ids[-1] = self._ids[-1], self._ids[i]
+            return self._ids.pop()
+
+def list_tasks(client, rng: random.Random, ids: TaskIds):
+    return client.get("/")
+
+def update_form(client, rng: random.Random, ids: TaskIds):
+    return client.get(f"/update/{ids.pick(rng)}")
+
+def create_task(client, rng: random.Random, ids: TaskIds):
+    return client.post("/", data={"content": f"Benchmark task {rng.random()}"})
+
+def update_task(client, rng: random.Random, ids: TaskIds):
+    return client.post(f"/update/{ids.pick(rng)}", data={"content": f"Updated task {rng.random()}"})
+
+def delete_task(client, rng: random.Random, ids: TaskIds):
+    return client.get(f"/delete/{ids.take(rng)}")
+
+# Route label and request of every operation
+OPERATIONS = {
+    "list": ("GET /", list_tasks),
+    "update_form": ("GET /update/<id>", update_form),
+    "create": ("POST /", create_task),
+    "update": ("POST /update/<id>", update_task),
+    "delete": ("GET /delete/<id>", delete_task),
+}
+
+def seed(num_rows: int) -> List[int]:
+    """Inserts the synthetic tasks and returns their ids"""
+
+    for first in range(0, num_rows, 50000):
+        rows = [{"content": f"Task {i}"} for i in range(first, min(first + 50000, num_rows))]
+        db.session.execute(Todo.__table__.insert(), rows)
+    db.session.commit()
+    return [task_id for (task_id,) in db.session.query(Todo.id)]
+
+def run_workload(args: argparse.Namespace, ids: TaskIds) -> dict:
+    """Drives the mixed workload from concurrent clients and summarizes it per route"""
+
+    weights = parse_mix(args.mix)
+    operations = list(weights)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client_loop(seed: int) -> None:
+        rng = random.Random(seed)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, [weights[name] for name in operations])[0]
+            route, send = OPERATIONS[operation]
+            start = time.perf_counter()
+            try:
+                ok = send(client, rng, ids).status_code < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies[route].append(elapsed)
+                else:
+                    errors[route] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client_loop, args=(args.seed * 1000 + i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    routes = {}
+    for route in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies[route])
+        routes[route] = {
+            "requests": len(values),
+            "errors": errors[route],
+            "throughput_rps": len(values) / elapsed,
+            "latency_ms": {
+                "p50": percentile(values, 0.50) * 1000 if values else None,
+                "p95": percentile(values, 0.95) * 1000 if values else None,
+                "p99": percentile(values, 0.99) * 1000 if values else None,
+            },
+        }
+    return routes
+
+def find_regressions(routes: dict, baseline: dict, threshold: float) -> List[str]:
+    """Compares every route with the baseline, a regression is a median latency
+    or throughput more than threshold worse
+
+    The median is compared rather than the tail, which under concurrent threads
+    mostly measures GIL scheduling and varies too much between runs.
+    """
+
+    regressions = []
+    for route, reference in baseline["routes"].items():
+        current = routes.get(route)
+        if current is None or not current["requests"]:
+            regressions.append(f"{route}: no successful request")
+            continue
+        p50, reference_p50 = current["latency_ms"]["p50"], reference["latency_ms"]["p50"]
+        if reference_p50 and p50 > reference_p50 * (1 + threshold):
+            regressions.append(f"{route}: p50 {p50:.1f}ms vs baseline {reference_p50:.1f}ms")
+        throughput, reference_throughput = current["throughput_rps"], reference["throughput_rps"]
+        if throughput < reference_throughput * (1 - threshold):
+            regressions.append(f"{route}: {throughput:.1f} req/s vs baseline {reference_throughput:.1f} req/s")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of the todo app with per-route latency and baselines")
+    parser.add_argument("--rows", default=10000, type=int, help="Tasks seeded before the load starts")
+    parser.add_argument("--concurrency", default=8, type=int, help="Concurrent clients")
+    parser.add_argument("--duration", default=10.0, type=float, help="Seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, type=str, help="Share of each operation, as op=weight,...")
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the workload")
+    parser.add_argument("--output", required=False, type=str, help="JSON file with the results")
+    parser.add_argument("--save-baseline", required=False, type=str, help="Store the results as the baseline")
+    parser.add_argument("--baseline", required=False, type=str, help="Fail if a route regressed against this baseline")
+    parser.add_argument("--threshold", default=0.2, type=float, help="Tolerated regression, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        app.config["PROPAGATE_EXCEPTIONS"] = True
+        with app.app_context():
+            init_db()
+            ids = TaskIds(seed(args.rows))
+        routes = run_workload(args, ids)
+
+    print(f"{'route':>20} {'req/s':>8} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for route, summary in routes.items():
+        latency = summary["latency_ms"]
+        print(
+            f"{route:>20} {summary['throughput_rps']:>8.1f} {summary['errors']:>7} "
+            + " ".join(f"{latency[name]:>7.1f}ms" if latency[name] is not None else f"{'-':>9}" for name in ("p50", "p95", "p99"))
+        )
+
+    results = {
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {name: getattr(args, name) for name in ("rows", "concurrency", "duration", "mix", "seed")},
+        "routes": routes,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["config"] != results["config"]:
+            print("Warning: The baseline was recorded with a different configuration.")
+        regressions = find_regressions(routes, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No route regressed beyond {args.threshold:.0%}")
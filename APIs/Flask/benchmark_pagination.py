@@ -0,0 +1,63 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import Todo, app, bump_list_version, db, encode_cursor, init_db
+
+def seed(num_rows: int) -> None:
+    """Fills the task table up to num_rows tasks with one bulk insert per chunk"""
+
+    existing = Todo.query.count()
+    start = datetime(2022, 1, 1)
+    rows = [
+        {"content": f"Task {i}", "date_created": start + timedelta(seconds=i)}
+        for i in range(existing, num_rows)
+    ]
+    for first in range(0, len(rows), 50000):
+        db.session.execute(Todo.__table__.insert(), rows[first:first + 50000])
+    # Pages cached before the insert must not be served for the larger table
+    bump_list_version()
+    db.session.commit()
+
+def time_get(client, url: str, repeat: int) -> float:
+    """Returns the median latency in ms of GET requests to an URL, rendered every time
+
+    Each request gets an extra query argument, ignored by the task list, so it
+    misses the render cache and the timings cover the query and the rendering.
+    """
+
+    latencies = []
+    separator = "&" if "?" in url else "?"
+    for i in range(repeat):
+        start = time.perf_counter()
+        response = client.get(f"{url}{separator}repeat={i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, f"{url} returned {response.status_code}"
+    return statistics.median(latencies)
+
+def cursor_of(task_id: int) -> str:
+    """Cursor of the page starting right after the given task"""
+
+    return encode_cursor(db.session.get(Todo, task_id))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the latency of task list pages as the table grows")
+    parser.add_argument("--sizes", nargs="+", default=[1000, 10000, 100000, 1000000], type=int, help="Table sizes to measure")
+    parser.add_argument("--repeat", default=20, type=int, help="Requests per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        init_db()
+        client = app.test_client()
+
+        print(f"{'rows':>10} {'first page':>12} {'middle page':>12} {'last page':>12}")
+        for size in sorted(args.sizes):
+            seed(size)
+            first = time_get(client, "/", args.repeat)
+            middle = time_get(client, f"/?after={cursor_of(size // 2)}", args.repeat)
+            last = time_get(client, f"/?before={cursor_of(size)}", args.repeat)
+            print(f"{size:>10} {first:>10.2f}ms {middle:>10.2f}ms {last:>10.2f}ms")
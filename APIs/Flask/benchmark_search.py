@@ -0,0 +1,65 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app import DEFAULT_PAGE_SIZE, Todo, app, db, init_db, search_tasks
+
+# Vocabulary of the synthetic tasks, the first words are far more frequent
+WORDS = ["buy", "call", "email", "fix", "write", "read", "clean", "plan", "book", "pay",
+         "milk", "report", "invoice", "dentist", "garden", "car", "meeting", "slides", "taxes", "flight"]
+
+def seed(num_rows: int, rng: random.Random) -> None:
+    """Fills the task table up to num_rows synthetic tasks"""
+
+    existing = Todo.query.count()
+    # Zipf-like weights, so some words match many tasks and others few
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    for first in range(existing, num_rows, 50000):
+        rows = [
+            {"content": " ".join(rng.choices(WORDS, weights, k=rng.randint(3, 8))) + f" #{i}"}
+            for i in range(first, min(first + 50000, num_rows))
+        ]
+        db.session.execute(Todo.__table__.insert(), rows)
+    db.session.commit()
+
+def median_ms(function, repeat: int) -> float:
+    """Returns the median latency in ms of a function call"""
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+def like_search(text: str) -> list:
+    """The search without an index: a LIKE scan of the task content"""
+
+    query = Todo.query
+    for word in text.split():
+        query = query.filter(Todo.content.like(f"%{word}%"))
+    return query.order_by(Todo.id).limit(DEFAULT_PAGE_SIZE).all()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the FTS5 search with a LIKE scan as the task table grows")
+    parser.add_argument("--sizes", nargs="+", default=[10000, 100000, 1000000], type=int, help="Table sizes to measure")
+    parser.add_argument("--queries", nargs="+", default=["buy", "dentist", "taxes flight", "123456"], help="Searches to time")
+    parser.add_argument("--repeat", default=10, type=int, help="Runs per measurement")
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the synthetic tasks")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        with app.app_context():
+            init_db()
+            print(f"{'rows':>10} {'query':>14} {'fts5':>10} {'like':>10}")
+            for size in sorted(args.sizes):
+                seed(size, rng)
+                for text in args.queries:
+                    fts = median_ms(lambda: search_tasks(text), args.repeat)
+                    like = median_ms(lambda: like_search(text), args.repeat)
+                    print(f"{size:>10} {text:>14} {fts:>8.2f}ms {like:>8.2f}ms")
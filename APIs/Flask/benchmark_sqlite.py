@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from profiling import percentile
+
+def setup_app(path: str, profile: str):
+    """Points the app at the benchmark database with the given SQLite profile"""
+
+    from app import app, configure_database
+
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    # Let locking errors reach the worker so they are counted instead of logged
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    configure_database(app, profile)
+    return app
+
+def prepare_database(path: str, profile: str, num_rows: int) -> None:
+    """Creates the schema and seeds the tasks the readers page through"""
+
+    app = setup_app(path, profile)
+    from app import Todo, db, init_db
+
+    with app.app_context():
+        init_db()
+        db.session.execute(Todo.__table__.insert(), [{"content": f"Task {i}"} for i in range(num_rows)])
+        db.session.commit()
+
+def run_worker(path: str, profile: str, duration: float, threads: int, write_ratio: float, seed: int) -> dict:
+    """Plays one server worker: concurrent threads mixing task list reads and task creations"""
+
+    import threading
+    from sqlalchemy.exc import OperationalError
+
+    app = setup_app(path, profile)
+    results = {"reads": [], "writes": [], "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def serve(thread_seed: int) -> None:
+        rng = random.Random(thread_seed)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            is_write = rng.random() < write_ratio
+            start = time.perf_counter()
+            try:
+                if is_write:
+                    response = client.post("/", data={"content": f"Task {rng.random()}"})
+                else:
+                    response = client.get("/")
+                ok = response.status_code < 400
+            except OperationalError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if not ok:
+                    results["errors"] += 1
+                else:
+                    results["writes" if is_write else "reads"].append(elapsed)
+
+    workers = [threading.Thread(target=serve, args=(seed * 1000 + i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+def run_profile(args: argparse.Namespace, profile: str) -> dict:
+    """Runs the concurrent workers against a fresh database using the given profile"""
+
+    # Fresh processes, so every worker creates its own engine with this profile
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "benchmark.db")
+        with context.Pool(args.workers) as pool:
+            pool.apply(prepare_database, (path, profile, args.rows))
+            worker_results = pool.starmap(
+                run_worker,
+                [(path, profile, args.duration, args.threads, args.write_ratio, seed) for seed in range(args.workers)],
+            )
+
+    reads = sorted(latency for result in worker_results for latency in result["reads"])
+    writes = sorted(latency for result in worker_results for latency in result["writes"])
+    return {
+        "reads": len(reads),
+        "writes": len(writes),
+        "errors": sum(result["errors"] for result in worker_results),
+        "throughput": (len(reads) + len(writes)) / args.duration,
+        "read_p95_ms": percentile(reads, 0.95) * 1000 if reads else float("nan"),
+        "write_p95_ms": percentile(writes, 0.95) * 1000 if writes else float("nan"),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent read/write load test of the SQLite profiles")
+    parser.add_argument("--profiles", nargs="+", default=["default", "wal"], help="SQLite profiles to compare")
+    parser.add_argument("--workers", default=4, type=int, help="Processes, like gunicorn workers")
+    parser.add_argument("--threads", default=4, type=int, help="Concurrent requests per process")
+    parser.add_argument("--duration", default=10.0, type=float, help="Seconds of load per profile")
+    parser.add_argument("--write-ratio", default=0.2, type=float, help="Fraction of requests creating a task")
+    parser.add_argument("--rows", default=10000, type=int, help="Tasks seeded before the load starts")
+    args = parser.parse_args()
+
+    print(f"{'profile':>8} {'req/s':>8} {'reads':>7} {'writes':>7} {'errors':>7} {'read p95':>10} {'write p95':>10}")
+    for profile in args.profiles:
+        result = run_profile(args, profile)
+        print(
+            f"{profile:>8} {result['throughput']:>8.1f} {result['reads']:>7} {result['writes']:>7} "
+            f"{result['errors']:>7} {result['read_p95_ms']:>8.1f}ms {result['write_p95_ms']:>8.1f}ms"
+        )
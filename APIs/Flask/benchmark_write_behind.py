@@ -0,0 +1,62 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+def run_mode(path: str, args: argparse.Namespace, write_behind: bool) -> dict:
+    """Posts tasks from concurrent threads and measures the inserts per second"""
+
+    # The app reads these when it's imported, which happens in this fresh process
+    os.environ["SQLITE_PROFILE"] = args.profile
+    os.environ["WRITE_BEHIND"] = "1" if write_behind else "0"
+    os.environ["WRITE_BEHIND_MAX_ROWS"] = str(args.max_rows)
+    os.environ["WRITE_BEHIND_MAX_DELAY_MS"] = str(args.max_delay_ms)
+    from app import Todo, app, init_db, insert_queue
+
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    with app.app_context():
+        init_db()
+
+    deadline = time.perf_counter() + args.duration
+
+    def post_tasks(thread_id: int) -> None:
+        client = app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            client.post("/", data={"content": f"Task {thread_id}-{i}"})
+            i += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=post_tasks, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Only rows that reached the database count
+    insert_queue.flush()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        rows = Todo.query.count()
+    return {"rows": rows, "elapsed": elapsed, "batches": insert_queue.batches}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares task inserts per second with and without write-behind")
+    parser.add_argument("--profile", default="wal", choices=["default", "wal"], help="SQLite profile of the app")
+    parser.add_argument("--threads", default=8, type=int, help="Concurrent clients posting tasks")
+    parser.add_argument("--duration", default=10.0, type=float, help="Seconds of load per mode")
+    parser.add_argument("--max-rows", default=100, type=int, help="Rows that trigger a write-behind batch")
+    parser.add_argument("--max-delay-ms", default=50.0, type=float, help="Maximum time a queued row waits")
+    args = parser.parse_args()
+
+    # Every mode runs in a fresh process, so the app is configured from scratch
+    context = multiprocessing.get_context("spawn")
+    print(f"{'mode':>20} {'inserts/s':>10} {'rows':>8} {'batches':>8}")
+    for write_behind in (False, True):
+        with tempfile.TemporaryDirectory() as tmp_dir, context.Pool(1) as pool:
+            result = pool.apply(run_mode, (os.path.join(tmp_dir, "benchmark.db"), args, write_behind))
+        mode = "write-behind" if write_behind else "commit per request"
+        print(f"{mode:>20} {result['rows'] / result['elapsed']:>10.1f} {result['rows']:>8} {result['batches']:>8}")
@@ -0,0 +1,12 @@
+import pytest
+
+from app import app, init_db
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client of the app on an empty SQLite file"""
+
+    monkeypatch.setitem(app.config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    with app.app_context():
+        init_db()
+    return app.test_client()
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+import jinja2
+from flask import Flask, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Requests kept per endpoint for the percentiles
+SAMPLES_PER_ENDPOINT = 1000
+
+# Runs of the same statement in one request reported as a likely N+1 query
+N_PLUS_ONE_THRESHOLD = 10
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Returns the nearest-rank percentile of already sorted values"""
+
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class ProfiledTemplate(jinja2.Template):
+    """A template adding its render time to the profile of the current request."""
+
+    def render(self, *args, **kwargs) -> str:
+        """Renders the template, timed when the request is profiled"""
+
+        if not has_request_context() or "profile" not in g:
+            return super().render(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            g.profile["render"] += time.perf_counter() - start
+
+class RequestProfiler:
+    """Records the SQL, render, commit and total time of every request.
+
+    Each response gets a Server-Timing header, and the last SAMPLES_PER_ENDPOINT
+    requests of every endpoint are aggregated by the stats endpoint. Samples are
+    kept per process, so every gunicorn worker reports its own requests.
+
+    Streamed responses, like the export, are left out: their body is produced
+    after the request is finished, so their timings would only cover the start.
+    """
+
+    def __init__(self, app: Flask = None, db=None, stats_url: str = "/_profiling/stats") -> None:
+        """Constructor.
+
+        Args:
+            app (Flask, optional): The app to instrument. Defaults to None
+                (call init_app later).
+            db (optional): The Flask-SQLAlchemy extension whose commits are
+                timed. Defaults to None.
+            stats_url (str, optional): Where the aggregated stats are served.
+                Defaults to "/_profiling/stats".
+        """
+
+        self._stats_url = stats_url
+        self._samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_ENDPOINT))
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app: Flask, db=None) -> None:
+        """Hooks the profiler into the app, its templates and its database"""
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.jinja_env.template_class = ProfiledTemplate
+        app.add_url_rule(self._stats_url, "profiling_stats", self.stats_view)
+
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(Engine, "handle_error", self._handle_error)
+        if db is not None:
+            event.listen(db.session, "before_commit", self._before_commit)
+            event.listen(db.session, "after_commit", self._after_commit)
+
+    @staticmethod
+    def _profile():
+        """The profile of the current request, None outside of a profiled request"""
+
+        return g.get("profile") if has_request_context() else None
+
+    def _start(self) -> None:
+        """Starts the profile of a request"""
+
+        g.profile = {"start": time.perf_counter(), "queries": 0, "sql": 0.0, "render": 0.0, "commit": 0.0,
+                     "statements": Counter()}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        """Notes when a statement starts, on the connection running it"""
+
+        profile = self._profile()
+        if profile is not None:
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        """Adds the time of a finished statement to the profile"""
+
+        if not conn.info.get("query_start"):
+            return
+        # Popped even outside of a profiled request, so nothing stays on the pooled connection
+        start = conn.info["query_start"].pop()
+        profile = self._profile()
+        if profile is not None:
+            profile["sql"] += time.perf_counter() - start
+            profile["queries"] += 1
+            profile["statements"][statement] += 1
+
+    def _handle_error(self, exception_context) -> None:
+        """Drops the start of a failed statement, which never reaches _after_cursor_execute"""
+
+        conn = exception_context.connection
+        if conn is not None and exception_context.statement is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    def _before_commit(self, session) -> None:
+        """Notes when a commit starts"""
+
+        profile = self._profile()
+        if profile is not None:
+            profile["commit_start"] = time.perf_counter()
+
+    def _after_commit(self, session) -> None:
+        """Adds the time of a finished commit to the profile"""
+
+        profile = self._profile()
+        if profile is not None and "commit_start" in profile:
+            # Includes the flush, whose statements are counted as SQL as well
+            profile["commit"] += time.perf_counter() - profile.pop("commit_start")
+
+    def _finish(self, response):
+        """Adds the Server-Timing header, warns about N+1 queries and records the sample"""
+
+        profile = g.pop("profile", None)
+        if profile is None or response.is_streamed:
+            return response
+        total = time.perf_counter() - profile["start"]
+        response.headers["Server-Timing"] = ", ".join([
+            f'sql;dur={profile["sql"] * 1000:.2f};desc="{profile["queries"]} queries"',
+            f'render;dur={profile["render"] * 1000:.2f}',
+            f'commit;dur={profile["commit"] * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+        statement, runs = profile["statements"].most_common(1)[0] if profile["statements"] else (None, 0)
+        if runs >= N_PLUS_ONE_THRESHOLD:
+            logger.warning(
+                "Possible N+1 query: %s %s ran the same statement %d times: %s",
+                request.method, request.path, runs, " ".join(statement.split()),
+            )
+
+        endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+        with self._lock:
+            self._samples[f"{request.method} {endpoint}"].append(
+                (total, profile["sql"], profile["render"], profile["commit"], profile["queries"])
+            )
+        return response
+
+    def stats(self) -> dict:
+        """Aggregates the recorded requests by endpoint, times in ms"""
+
+        with self._lock:
+            samples = {endpoint: list(values) for endpoint, values in self._samples.items()}
+        stats = {}
+        for endpoint, values in samples.items():
+            summary = {"requests": len(values), "mean_queries": sum(value[4] for value in values) / len(values)}
+            for i, name in enumerate(("total", "sql", "render", "commit")):
+                times = sorted(value[i] * 1000 for value in values)
+                summary[f"{name}_ms"] = {
+                    "p50": percentile(times, 0.50),
+                    "p95": percentile(times, 0.95),
+                    "p99": percentile(times, 0.99),
+                    "max": times[-1],
+                }
+            stats[endpoint] = summary
+        return stats
+
+    def stats_view(self):
+        """Serves the aggregated stats as JSON"""
+
+        return jsonify(self.stats())
@@ -0,0 +1,102 @@
+import pytest
+
+from app import app, db, Todo
+
+def add_tasks(*contents: str) -> list:
+    """Inserts tasks directly and returns their ids"""
+
+    with app.app_context():
+        tasks = [Todo(content=content) for content in contents]
+        db.session.add_all(tasks)
+        db.session.commit()
+        return [task.id for task in tasks]
+
+def stored_tasks() -> dict:
+    """The content of every task in the database by id"""
+
+    with app.app_context():
+        return {task.id: task.content for task in Todo.query}
+
+def test_bulk_create(client):
+    """Makes sure created tasks are stored and their ids returned in order."""
+
+    # Act
+    response = client.post("/api/tasks/bulk", json=[{"op": "create", "content": f"Task {i}"} for i in range(3)])
+
+    # Assert
+    assert 200 == response.status_code
+    results = response.get_json()["results"]
+    assert [0, 1, 2] == [result["index"] for result in results]
+    assert {result["id"]: f"Task {i}" for i, result in enumerate(results)} == stored_tasks()
+
+def test_bulk_mixed_operations(client):
+    """Makes sure creates, updates and deletes are all applied."""
+
+    # Arrange
+    kept, deleted = add_tasks("Old content", "To delete")
+
+    # Act
+    response = client.post("/api/tasks/bulk", json=[
+        {"op": "update", "id": kept, "content": "New content"},
+        {"op": "create", "content": "Created"},
+        {"op": "delete", "id": deleted},
+    ])
+
+    # Assert
+    assert 200 == response.status_code
+    results = response.get_json()["results"]
+    assert ["update", "create", "delete"] == [result["op"] for result in results]
+    assert {kept: "New content", results[1]["id"]: "Created"} == stored_tasks()
+
+def test_bulk_all_or_nothing(client):
+    """Makes sure a batch with an invalid operation changes nothing and
+    reports every invalid operation."""
+
+    # Arrange
+    (task_id,) = add_tasks("Untouched")
+
+    # Act
+    response = client.post("/api/tasks/bulk", json=[
+        {"op": "create", "content": "Valid"},
+        {"op": "update", "id": task_id, "content": ""},
+        {"op": "delete", "id": task_id + 1000},
+        {"op": "rename"},
+        {"op": "delete", "id": task_id},
+    ])
+
+    # Assert
+    assert 400 == response.status_code
+    assert [1, 2, 3, 4] == [error["index"] for error in response.get_json()["errors"]]
+    assert {task_id: "Untouched"} == stored_tasks()
+
+def test_bulk_empty(client):
+    """Makes sure an empty batch succeeds without changes."""
+
+    # Act
+    response = client.post("/api/tasks/bulk", json=[])
+
+    # Assert
+    assert 200 == response.status_code
+    assert {"results": []} == response.get_json()
+    assert {} == stored_tasks()
+
+@pytest.mark.parametrize(
+    "body, expected_status",
+    [
+        ({"op": "create", "content": "Not a list"}, 400),
+        ([{"op": "create", "content": "Too many"}] * 3, 413),
+    ],
+)
+def test_bulk_rejected_body(client, monkeypatch, body, expected_status):
+    """Makes sure bodies that aren't a list or hold too many operations are
+    rejected."""
+
+    # Arrange
+    monkeypatch.setitem(app.config, "BULK_MAX_OPERATIONS", 2)
+
+    # Act
+    response = client.post("/api/tasks/bulk", json=body)
+
+    # Assert
+    assert expected_status == response.status_code
+    assert {} == stored_tasks()
@@ -0,0 +1,142 @@
+import time
+from typing import List
+
+import pytest
+
+import write_behind
+from write_behind import WriteBehindQueue
+
+class FakeWriter:
+    """A write_batch that records the batches and fails on demand."""
+
+    def __init__(self) -> None:
+        self.batches: List[List[dict]] = []
+        # Calls that fail before the next one succeeds
+        self.failures = 0
+        # Rows failing every batch that holds them
+        self.bad_rows: List[dict] = []
+
+    def __call__(self, batch: List[dict]) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Database is unavailable")
+        if any(row in self.bad_rows for row in batch):
+            raise ValueError("Bad row")
+        self.batches.append(list(batch))
+
+    @property
+    def rows(self) -> List[dict]:
+        """Every row written, in order"""
+
+        return [row for batch in self.batches for row in batch]
+
+@pytest.fixture
+def writer(monkeypatch):
+    """A fake write_batch, with retries happening right away"""
+
+    monkeypatch.setattr(write_behind, "RETRY_INTERVAL", 0.0)
+    return FakeWriter()
+
+def test_batches_by_max_rows(writer):
+    """Makes sure queued rows are written in batches of max_rows."""
+
+    # Arrange
+    write_queue = WriteBehindQueue(writer, max_rows=3, max_delay_ms=60000)
+
+    # Act
+    for i in range(7):
+        write_queue.put({"id": i})
+    write_queue.flush()
+
+    # Assert
+    assert [3, 3, 1] == [len(batch) for batch in writer.batches]
+    assert [{"id": i} for i in range(7)] == writer.rows
+    assert (3, 7) == (write_queue.batches, write_queue.rows)
+    write_queue.close()
+
+def test_written_after_max_delay(writer):
+    """Makes sure a row is written after max_delay_ms without a flush."""
+
+    # Arrange
+    write_queue = WriteBehindQueue(writer, max_rows=100, max_delay_ms=10)
+
+    # Act
+    write_queue.put({"id": 1})
+    deadline = time.monotonic() + 5
+    while not writer.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # Assert
+    assert [[{"id": 1}]] == writer.batches
+    write_queue.close()
+
+def test_retry(writer):
+    """Makes sure a batch that fails a few times is written once it succeeds."""
+
+    # Arrange
+    writer.failures = 2
+    write_queue = WriteBehindQueue(writer, max_rows=10, max_retries=5)
+
+    # Act
+    for i in range(3):
+        write_queue.put({"id": i})
+    write_queue.flush()
+
+    # Assert
+    assert [[{"id": i} for i in range(3)]] == writer.batches
+    assert 0 == write_queue.dead_rows
+    write_queue.close()
+
+def test_dead_letter(writer):
+    """Makes sure a row that keeps failing is handed to dead_letter and the
+    other rows of its batch are still written."""
+
+    # Arrange
+    dead = []
+    writer.bad_rows = [{"id": 1}]
+    write_queue = WriteBehindQueue(writer, max_rows=10, max_retries=2, dead_letter=dead.extend)
+
+    # Act
+    for i in range(3):
+        write_queue.put({"id": i})
+    write_queue.flush()
+
+    # Assert
+    assert [{"id": 0}, {"id": 2}] == writer.rows
+    assert [{"id": 1}] == dead
+    assert (1, 2) == (write_queue.dead_rows, write_queue.rows)
+    write_queue.close()
+
+def test_close_drains(writer):
+    """Makes sure closing the queue writes the rows still queued."""
+
+    # Arrange
+    write_queue = WriteBehindQueue(writer, max_rows=100, max_delay_ms=60000)
+    for i in range(5):
+        write_queue.put({"id": i})
+
+    # Act
+    write_queue.close()
+
+    # Assert
+    assert [{"id": i} for i in range(5)] == writer.rows
+    with pytest.raises(AssertionError):
+        write_queue.put({"id": 5})
+
+def test_close_does_not_retry(writer, monkeypatch):
+    """Makes sure closing doesn't wait between retries of a failing batch."""
+
+    # Arrange
+    monkeypatch.setattr(write_behind, "RETRY_INTERVAL", 60.0)
+    writer.failures = 1
+    write_queue = WriteBehindQueue(writer, max_rows=100, max_delay_ms=60000, max_retries=5)
+    for i in range(2):
+        write_queue.put({"id": i})
+
+    # Act
+    start = time.monotonic()
+    write_queue.close()
+
+    # Assert
+    assert time.monotonic() - start < 30
+    assert [{"id": 0}, {"id": 1}] == writer.rows
@@ -0,0 +1,187 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds before the first retry of a batch that failed, doubled on every
+# further retry up to MAX_RETRY_INTERVAL
+RETRY_INTERVAL = 1.0
+MAX_RETRY_INTERVAL = 30.0
+
+class WriteBehindQueue:
+    """Buffers rows in memory and writes them in batches from a background thread.
+
+    A batch is written, in one transaction, as soon as it holds max_rows rows or
+    its oldest row waited max_delay_ms. Rows still queued are written by close(),
+    which runs at interpreter exit, so a graceful shutdown loses nothing. Rows
+    queued by a process that crashes are lost.
+
+    A batch that keeps failing is retried max_retries times with a growing
+    delay, then written row by row so a single bad row can't hold back the
+    others. The rows that still fail are handed to dead_letter.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[dict]], None],
+        max_rows: int = 100,
+        max_delay_ms: float = 50.0,
+        max_retries: int = 5,
+        dead_letter: Optional[Callable[[List[dict]], None]] = None,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            write_batch (Callable[[List[dict]], None]): Writes a batch of rows
+                in a single transaction.
+            max_rows (int, optional): Rows that trigger a write. Defaults to 100.
+            max_delay_ms (float, optional): Maximum time a row waits to be
+                written. Defaults to 50.0.
+            max_retries (int, optional): Retries of a failed batch before its
+                rows are written one by one. Defaults to 5.
+            dead_letter (Optional[Callable[[List[dict]], None]], optional):
+                Receives the rows that can't be written. Defaults to None
+                (they are only logged).
+        """
+
+        assert max_rows > 0, f"{max_rows} must be a positive number."
+        assert max_delay_ms >= 0, f"{max_delay_ms} must be a non-negative number."
+        assert max_retries >= 0, f"{max_retries} must be a non-negative number."
+        self._write_batch = write_batch
+        self._max_rows = max_rows
+        self._max_delay = max_delay_ms / 1000
+        self._max_retries = max_retries
+        self._dead_letter = dead_letter
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.batches = 0
+        self.rows = 0
+        self.dead_rows = 0
+
+    def _ensure_started(self) -> None:
+        """Starts the writer thread in this process, forked workers don't inherit it"""
+
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def put(self, row: dict) -> None:
+        """Queues a row to be written"""
+
+        assert not self._closed, "Error: The queue is closed."
+        self._ensure_started()
+        self._queue.put(row)
+
+    def flush(self) -> None:
+        """Blocks until every row queued so far is written"""
+
+        if self._thread is None or self._pid != os.getpid():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        """Writes the queued rows and stops the writer thread"""
+
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write(self, batch: List[dict], stopping: bool) -> None:
+        """Writes a batch, retrying with backoff unless the process is exiting"""
+
+        if not batch:
+            return
+        retries = 0 if stopping else self._max_retries
+        for attempt in range(retries + 1):
+            try:
+                self._write_batch(batch)
+            except Exception:
+                logger.exception("Writing %d queued rows failed (attempt %d)", len(batch), attempt + 1)
+                if attempt < retries:
+                    time.sleep(min(RETRY_INTERVAL * 2 ** attempt, MAX_RETRY_INTERVAL))
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            return
+
+        # Isolates the rows that can't be written from the rest of the batch
+        failed = []
+        for row in batch:
+            try:
+                self._write_batch([row])
+            except Exception:
+                failed.append(row)
+                continue
+            self.batches += 1
+            self.rows += 1
+        if failed:
+            self._drop(failed)
+
+    def _drop(self, rows: List[dict]) -> None:
+        """Gives up on rows, handing them to dead_letter"""
+
+        self.dead_rows += len(rows)
+        logger.error("%d queued rows could not be written and were dropped: %r", len(rows), rows)
+        if self._dead_letter is not None:
+            try:
+                self._dead_letter(rows)
+            except Exception:
+                logger.exception("The dead letter handler failed")
+
+    def _run(self) -> None:
+        """Collects rows into batches until max_rows or max_delay_ms and writes them"""
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self._max_delay
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    # A flush writes right away instead of waiting for the batch to fill
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stopping or waiters or len(batch) >= self._max_rows:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            if stopping:
+                # Drain whatever was queued before close()
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not None:
+                        batch.append(item)
+            self._write(batch, stopping)
+            for waiter in waiters:
+                waiter.set()
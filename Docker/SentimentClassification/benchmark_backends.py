@@ -0,0 +1,126 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import List
+
+from benchmark_utils import WORDS, percentile
+
+def make_texts(num_texts: int, num_words: int, seed: int) -> List[str]:
+    """Builds reproducible synthetic reviews of a fixed number of words"""
+
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=num_words)) for _ in range(num_texts)]
+
+def run_backend(args: argparse.Namespace) -> dict:
+    """Measures a single backend in the current process"""
+
+    from classify import MAX_MODEL_TOKENS, MODEL_NAME, SentimentClassifier, peak_rss_mb
+
+    start = time.perf_counter()
+    sentiment_classifier = SentimentClassifier(MODEL_NAME, backend=args.backend, cpu=args.cpu, warmup=True)
+    load_time = time.perf_counter() - start
+    rss_after_load = peak_rss_mb()
+
+    runs = []
+    for num_words in args.input_words:
+        for batch_size in args.batch_sizes:
+            texts = make_texts(batch_size * args.iterations, num_words, args.seed)
+            batches = [texts[first:first + batch_size] for first in range(0, len(texts), batch_size)]
+            # A budget that always fits the whole batch, so every call is one forward pass
+            max_batch_tokens = batch_size * MAX_MODEL_TOKENS
+
+            for batch in batches[:args.warmup_iterations]:
+                sentiment_classifier.predict_batch(batch, max_batch_tokens=max_batch_tokens)
+
+            latencies = []
+            for batch in batches:
+                batch_start = time.perf_counter()
+                sentiment_classifier.predict_batch(batch, max_batch_tokens=max_batch_tokens)
+                latencies.append(time.perf_counter() - batch_start)
+
+            total = sum(latencies)
+            latencies.sort()
+            runs.append({
+                "input_words": num_words,
+                "batch_size": batch_size,
+                "iterations": len(batches),
+                "throughput_texts_per_s": len(texts) / total,
+                "latency_ms": {
+                    "mean": total / len(latencies) * 1000,
+                    "p50": percentile(latencies, 0.50) * 1000,
+                    "p95": percentile(latencies, 0.95) * 1000,
+                    "p99": percentile(latencies, 0.99) * 1000,
+                },
+            })
+
+    return {
+        "backend": args.backend,
+        "load_time_s": load_time,
+        "startup_timings_s": sentiment_classifier.startup_timings,
+        "peak_rss_after_load_mb": rss_after_load,
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": runs,
+    }
+
+def environment() -> dict:
+    """Describes the machine and library versions the results belong to"""
+
+    versions = {}
+    for module in ("transformers", "torch", "tensorflow"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor(), **versions}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the PyTorch and Tensorflow backends of SentimentClassifier")
+    parser.add_argument("--backends", nargs="+", default=["pt", "tf"], choices=["pt", "tf"], help="Backends to measure")
+    parser.add_argument("--batch-sizes", nargs="+", default=[1, 8, 32], type=int, help="Texts per forward pass")
+    parser.add_argument("--input-words", nargs="+", default=[16, 128, 384], type=int, help="Words per synthetic text")
+    parser.add_argument("--iterations", default=20, type=int, help="Measured batches per configuration")
+    parser.add_argument("--warmup-iterations", default=2, type=int, help="Unmeasured batches per configuration")
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the synthetic texts")
+    parser.add_argument("--cpu", action="store_true", help="Run the models on CPU")
+    parser.add_argument("--output", default="benchmark_backends.json", type=str, help="JSON file with the results")
+    parser.add_argument("--backend", required=False, type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        # Child process: measure one backend and hand the results back on stdout
+        print(json.dumps(run_backend(args)))
+        sys.exit(0)
+
+    # Every backend runs in a fresh process, so load time and peak RSS aren't
+    # polluted by the framework measured before it
+    results = {"environment": environment(), "config": vars(args), "backends": {}}
+    for backend in args.backends:
+        command = [sys.executable, __file__, "--backend", backend, "--seed", str(args.seed),
+                   "--iterations", str(args.iterations), "--warmup-iterations", str(args.warmup_iterations),
+                   "--batch-sizes", *map(str, args.batch_sizes), "--input-words", *map(str, args.input_words)]
+        if args.cpu:
+            command.append("--cpu")
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"Error: The {backend} backend failed:\n{completed.stderr}")
+            results["backends"][backend] = {"error": completed.stderr.strip().splitlines()[-1:]}
+            continue
+        results["backends"][backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        summary = results["backends"][backend]
+        print(f"{backend}: load {summary['load_time_s']:.2f}s - peak RSS {summary['peak_rss_mb']:.0f}MB")
+        for run in summary["runs"]:
+            print(
+                f"  words {run['input_words']:>4} batch {run['batch_size']:>3}: "
+                f"{run['throughput_texts_per_s']:8.1f} texts/s - p50 {run['latency_ms']['p50']:.1f}ms - "
+                f"p95 {run['latency_ms']['p95']:.1f}ms - p99 {run['latency_ms']['p99']:.1f}ms"
+            )
+
+    results["config"].pop("backend")
+    with open(args.output, 'w', encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,48 @@
+import argparse
+import random
+import time
+
+from benchmark_utils import WORDS
+from classify import MODEL_NAME, SentimentClassifier
+
+def load_texts(file: str, num_texts: int) -> list:
+    """Loads one text per line or builds synthetic reviews of varying length"""
+    
+    if file:
+        with open(file, 'r', encoding="utf-8") as input_f:
+            texts = [line.strip() for line in input_f if line.strip()]
+        return (texts * (num_texts // len(texts) + 1))[:num_texts]
+    
+    rng = random.Random(0)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(3, 200))) for _ in range(num_texts)]
+
+def time_it(func, *args, **kwargs) -> tuple:
+    """Runs a function and returns its result and the elapsed seconds"""
+    
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares one-at-a-time and batched classification throughput")
+    parser.add_argument("--file", required=False, type=str, help="A file with one text to classify per line")
+    parser.add_argument("--num-texts", default=1000, type=int, help="Number of texts to classify")
+    parser.add_argument("--max-batch-tokens", default=8192, type=int, help="Token budget per batch")
+    parser.add_argument("--backend", default="pt", choices=["pt", "tf"], help="Deep learning framework running the model")
+    args = parser.parse_args()
+    
+    texts = load_texts(args.file, args.num_texts)
+    sentiment_classifier = SentimentClassifier(MODEL_NAME, backend=args.backend)
+    
+    # Warm up both paths so lazy initialization does not skew the first measurement
+    sentiment_classifier.predict(texts[0])
+    sentiment_classifier.predict_batch(texts[:8], max_batch_tokens=args.max_batch_tokens)
+    
+    single, single_time = time_it(lambda: [sentiment_classifier.predict(text) for text in texts])
+    batched, batched_time = time_it(sentiment_classifier.predict_batch, texts, max_batch_tokens=args.max_batch_tokens)
+    
+    agreement = sum(s["label"] == b["label"] for s, b in zip(single, batched)) / len(texts)
+    print(f"Texts: {len(texts)}")
+    print(f"One-at-a-time: {single_time:.2f}s ({len(texts) / single_time:.1f} texts/s)")
+    print(f"Batched:       {batched_time:.2f}s ({len(texts) / batched_time:.1f} texts/s)")
+    print(f"Speed-up: {single_time / batched_time:.2f}x - Label agreement: {agreement:.2%}")
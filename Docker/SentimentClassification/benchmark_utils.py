@@ -0,0 +1,11 @@
+from typing import List
+
+# Vocabulary used to build synthetic reviews
+WORDS = ["good", "bad", "movie", "plot", "actor", "boring", "great", "awful",
+         "love", "hate", "the", "was", "and", "really", "not", "story"]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of already sorted values"""
+
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
@@ -1,49 +1,1100 @@
 import argparse
+import collections
+import itertools
+import json
+import math
+import multiprocessing
 import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+from prediction_cache import PredictionCache
 
-class SentimentClassifier:
+# The deep learning stack is imported lazily by SentimentClassifier, so the CLI
+# parses its arguments and fails fast on bad input before paying for it
+if TYPE_CHECKING:
+    from transformers import PreTrainedModel, TFPreTrainedModel
+
+# Model bundled in both images
+MODEL_NAME = r"./models/distilbert-base-uncased-finetuned-sst-2-english"
+
+# Fallback reference point of the startup report where the start time of the
+# process can't be read, taken after the interpreter started and this module
+# was imported so it understates the startup cost
+MODULE_LOADED = time.perf_counter()
+
+# Dummy input of the warm-up pass
+WARMUP_TEXT = "Warming up the sentiment classifier."
+
+# Upper bound of (batch size x longest sequence) tokens fed to a single forward pass
+DEFAULT_MAX_BATCH_TOKENS = 8192
+
+# Texts read, classified and written at once in streaming mode
+DEFAULT_STREAM_BATCH_SIZE = 256
+
+# Pipelined mode: texts per forward pass, batches buffered between two stages
+# and how often a blocked stage checks whether the pipeline was stopped
+DEFAULT_PIPELINE_BATCH_SIZE = 32
+DEFAULT_PIPELINE_QUEUE_SIZE = 4
+PIPELINE_POLL_INTERVAL = 0.1
+
+# Files classified at once by a worker in directory mode, and how often the
+# parent checks that its workers are alive while waiting for results
+DEFAULT_SHARD_SIZE = 64
+WORKER_POLL_INTERVAL = 1.0
+
+# Long-document mode: maximum input length of the model and sliding-window defaults
+MAX_MODEL_TOKENS = 512
+DEFAULT_WINDOW_OVERLAP = 128
+DEFAULT_WINDOW_BATCH_SIZE = 16
+
+def process_uptime() -> float:
+    """Seconds since the process started, interpreter start-up included
+
+    Read from /proc on Linux, elsewhere measured from the import of this module.
+    """
+
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # The fields after the command name, which may contain spaces
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, AttributeError, ValueError, IndexError):
+        return time.perf_counter() - MODULE_LOADED
+
+def make_length_buckets(lengths: List[int], max_batch_tokens: int) -> List[List[int]]:
+    """Groups inputs into padding-minimal batches under a token budget.
+
+    Inputs are sorted by token length so each batch holds sequences of similar
+    size, and a batch is closed as soon as padding every member to the longest
+    one would exceed ``max_batch_tokens``. Inputs longer than the budget get a
+    batch on their own.
+
+    Args:
+        lengths (List[int]): The token length of every input.
+        max_batch_tokens (int): Maximum padded tokens per batch.
+
+    Returns:
+        List[List[int]]: Batches of indices into ``lengths``.
+    """
+
+    assert max_batch_tokens > 0, f"{max_batch_tokens} must be a positive number."
+
+    batches = []
+    batch = []
+    for idx in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # Sorted ascending, so the current input is the longest of the batch
+        if batch and (len(batch) + 1) * lengths[idx] > max_batch_tokens:
+            batches.append(batch)
+            batch = []
+        batch.append(idx)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def softmax(logits: List[float]) -> List[float]:
+    """Turns a list of logits into probabilities"""
+    
+    top = max(logits)
+    exps = [math.exp(logit - top) for logit in logits]
+    total = sum(exps)
+    return [exp / total for exp in exps]
+
+def logits_to_prediction(logits: List[float], id2label: Dict[int, str]) -> dict:
+    """Turns the logits of a text into its most likely label and that label's probability"""
+    
+    probabilities = softmax(logits)
+    best = max(range(len(probabilities)), key=lambda label: probabilities[label])
+    return {"label": id2label[best], "score": probabilities[best]}
+
+# Ways reduce_window_logits combines the windows of a document
+REDUCTIONS = ["mean", "weighted", "max"]
+
+def reduce_window_logits(window_logits: List[List[float]], window_lengths: List[int], reduction: str) -> List[float]:
+    """Combines the logits of every window into the probabilities of the document
+
+    Args:
+        window_logits (List[List[float]]): The logits of every window.
+        window_lengths (List[int]): The number of text tokens of every window.
+        reduction (str): "mean" averages the logits, "weighted" averages them
+            weighted by window length and "max" keeps the most confident window.
+
+    Returns:
+        List[float]: The probability of every label.
+    """
+    
+    assert reduction in REDUCTIONS, f"Invalid reduction: {reduction}. Must be one of {REDUCTIONS}."
+    if reduction == "max":
+        return max((softmax(logits) for logits in window_logits), key=max)
+    if reduction == "mean":
+        weights = [1] * len(window_logits)
+    else:
+        weights = window_lengths
+    
+    total = sum(weights)
+    num_labels = len(window_logits[0])
+    return softmax([
+        sum(weight * logits[label] for weight, logits in zip(weights, window_logits)) / total
+        for label in range(num_labels)
+    ])
+
+def read_records(
+    file: str, input_format: str = "lines", text_field: str = "text", start_line: int = 0
+) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+    """Lazily reads the texts of a line-delimited or JSONL file
+
+    Args:
+        file (str): The input file.
+        input_format (str, optional): "lines" for one text per line or "jsonl"
+            for one JSON object per line. Defaults to "lines".
+        text_field (str, optional): Key holding the text of a JSONL record.
+            Defaults to "text".
+        start_line (int, optional): Lines before this number are skipped.
+            Defaults to 0.
+
+    Yields:
+        Tuple[int, Optional[str], Optional[str]]: The line number, its text and
+            None, or None and why the line has no text. Blank lines are skipped.
+    """
+    
+    with open(file, 'r', encoding="utf-8") as input_f:
+        for line_number, line in enumerate(input_f):
+            if line_number < start_line or not line.strip():
+                continue
+            if input_format != "jsonl":
+                yield line_number, line.rstrip("\r\n"), None
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict) or not isinstance(record.get(text_field), str):
+                yield line_number, None, f"No string field {text_field!r}"
+                continue
+            yield line_number, record[text_field], None
+
+def batched(records: Iterable, batch_size: int) -> Iterator[list]:
+    """Splits an iterable into lists of at most batch_size items"""
+    
+    assert batch_size > 0, f"{batch_size} must be a positive number."
+    
+    iterator = iter(records)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+# Marks the end of the input in the queues of the pipelined mode
+_PIPELINE_END = object()
+
+class _PipelineFailure:
+    """Carries the exception of a pipeline stage to the stages after it."""
+    
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+def _queue_put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Puts an item into a bounded queue, giving up when the pipeline stops"""
+    
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=PIPELINE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _queue_get(q: queue.Queue, stop: threading.Event):
+    """Gets an item from a queue, returning the end marker when the pipeline stops"""
+    
+    while not stop.is_set():
+        try:
+            return q.get(timeout=PIPELINE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return _PIPELINE_END
+
+def resume_point(out_file: str) -> int:
+    """Finds the first input line that has no result in a streamed output file
+
+    A trailing partial record left by a crash is truncated, so the output keeps
+    exactly one complete JSON result per line.
+
+    Args:
+        out_file (str): The output file of a previous (maybe crashed) run.
+
+    Returns:
+        int: The line number to resume from, 0 if there's nothing to resume.
+    """
+    
+    if not os.path.exists(out_file):
+        return 0
+    
+    next_line, valid_bytes = 0, 0
+    with open(out_file, 'rb') as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                next_line = json.loads(raw)["line"] + 1
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(raw)
+    
+    if valid_bytes < os.path.getsize(out_file):
+        with open(out_file, 'r+b') as f:
+            f.truncate(valid_bytes)
+    return next_line
+
+def classify_stream(
+    sentiment_classifier: "SentimentClassifier",
+    file: str,
+    out_file: str,
+    input_format: str = "lines",
+    text_field: str = "text",
+    batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+    pipelined: bool = False,
+) -> Tuple[int, int]:
+    """Classifies a file in bounded batches writing one JSON result per line
+
+    Only one batch is kept in memory at a time and every batch is flushed to
+    disk before the next one is read, so a crashed run resumes after the last
+    result written. A line without text, like malformed JSON, gets a
+    ``{"line": ..., "error": ...}`` result instead of stopping the run.
+
+    Args:
+        sentiment_classifier (SentimentClassifier): The classifier to use.
+        file (str): The input file.
+        out_file (str): The JSONL output file, appended to when resuming.
+        input_format (str, optional): "lines" or "jsonl". Defaults to "lines".
+        text_field (str, optional): Key holding the text of a JSONL record.
+            Defaults to "text".
+        batch_size (int, optional): Texts classified at once. Defaults to
+            DEFAULT_STREAM_BATCH_SIZE.
+        pipelined (bool, optional): Classifies with predict_pipelined, which
+            tokenizes the next texts while the model runs. Defaults to False.
+
+    Returns:
+        Tuple[int, int]: The number of texts classified and of lines that
+            failed in this run.
+    """
+    
+    start_line = resume_point(out_file)
+    records = read_records(file, input_format, text_field, start_line)
     
-    def __init__(self, model_name: str) -> None:
-        """Initializes a Sentiment Classifier"""
+    def classify_batch(batch: list) -> List[Tuple[int, dict]]:
+        texts = [text for _, text, error in batch if error is None]
+        predictions = iter(sentiment_classifier.predict_batch(texts) if texts else [])
+        return [
+            (line_number, {"error": error} if error is not None else next(predictions))
+            for line_number, _, error in batch
+        ]
+    
+    def pipelined_results() -> Iterator[Tuple[int, dict]]:
+        # The tokenizer thread reads ahead, so line numbers wait in a queue
+        # until their predictions come out of the pipeline
+        pending = collections.deque()
         
-        self._model = self._load_model(model_name)
+        def texts() -> Iterator[str]:
+            for line_number, text, error in records:
+                pending.append((line_number, error))
+                if error is None:
+                    yield text
         
-    def _load_model(self, model_name: str) -> pipeline:
-        """Loads a model for sentiment classification"""
+        for prediction in sentiment_classifier.predict_pipelined(texts()):
+            line_number, error = pending.popleft()
+            # Failed lines read before this text keep their place in the output
+            while error is not None:
+                yield line_number, {"error": error}
+                line_number, error = pending.popleft()
+            yield line_number, prediction
+        for line_number, error in pending:
+            yield line_number, {"error": error}
+    
+    if pipelined:
+        batches = batched(pipelined_results(), batch_size)
+    else:
+        batches = (classify_batch(batch) for batch in batched(records, batch_size))
+    
+    num_classified, num_failed = 0, 0
+    with open(out_file, 'a', encoding="utf-8") as f:
+        for batch in batches:
+            for line_number, prediction in batch:
+                f.write(json.dumps({"line": line_number, **prediction}) + "\n")
+                if "error" in prediction:
+                    num_failed += 1
+                else:
+                    num_classified += 1
+            f.flush()
+            os.fsync(f.fileno())
+    return num_classified, num_failed
+
+# Set in every worker process of the directory mode by _load_worker_classifier
+_worker_classifier = None
+_worker_error = None
+
+# Sent by a worker of the directory mode that stops taking shards, as it's over its memory limit
+_WORKER_RETIRED = "retired"
+
+def pending_files(directory: str, merged_output: Optional[str] = None) -> List[str]:
+    """Lists the input files of a directory that have no out_<name> counterpart yet
+
+    Args:
+        directory (str): The directory with the files to classify.
+        merged_output (Optional[str], optional): The merged output file, never
+            taken as an input. Defaults to None.
+
+    Returns:
+        List[str]: The sorted paths of the files to classify.
+    """
+    
+    names = set(os.listdir(directory))
+    merged_name = os.path.basename(merged_output) if merged_output else None
+    return [
+        os.path.join(directory, name)
+        for name in sorted(names)
+        if not name.startswith("out_")
+        and f"out_{name}" not in names
+        and name != merged_name
+        and os.path.isfile(os.path.join(directory, name))
+    ]
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process in MB (Unix only)"""
+    
+    import resource
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _load_worker_classifier(classifier_kwargs: dict) -> None:
+    """Loads the classifier of a worker once, or keeps why it failed"""
+    
+    global _worker_classifier, _worker_error
+    
+    if _worker_classifier is not None or _worker_error is not None:
+        return
+    # The failure is reported by every shard of the worker instead of ending it
+    try:
+        _worker_classifier = SentimentClassifier(**classifier_kwargs)
+    except Exception as e:
+        _worker_error = f"Worker failed to load the classifier: {e!r}"
+
+def _classify_shard(paths: List[str], long: bool) -> List[Tuple[str, Optional[dict], Optional[str]]]:
+    """Classifies every file of a shard in a worker process
+
+    Returns:
+        List[Tuple[str, Optional[dict], Optional[str]]]: The path, prediction
+            and error message of every file.
+    """
+    
+    if _worker_error is not None:
+        return [(path, None, _worker_error) for path in paths]
+    
+    texts, results = [], []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding="utf-8") as input_f:
+                texts.append((path, input_f.read()))
+        except (OSError, UnicodeDecodeError) as e:
+            results.append((path, None, str(e)))
+    
+    if long:
+        predictions = [_worker_classifier.predict_long(text) for _, text in texts]
+    else:
+        predictions = _worker_classifier.predict_batch([text for _, text in texts])
+    return results + [(path, prediction, None) for (path, _), prediction in zip(texts, predictions)]
+
+def _directory_worker(
+    classifier_kwargs: dict,
+    long: bool,
+    max_memory_mb: Optional[int],
+    shard_queue: multiprocessing.Queue,
+    result_queue: multiprocessing.Queue,
+) -> None:
+    """Classifies shards until it gets None or grows over max_memory_mb
+
+    The peak RSS never goes down, so a worker over the limit retires and the
+    parent starts a fresh one in its place.
+    """
+    
+    while True:
+        paths = shard_queue.get()
+        if paths is None:
+            return
+        # Loaded on the first shard, so a worker started when none is left doesn't pay for it
+        _load_worker_classifier(classifier_kwargs)
+        result_queue.put(_classify_shard(paths, long))
+        if max_memory_mb and peak_rss_mb() > max_memory_mb:
+            result_queue.put(_WORKER_RETIRED)
+            return
+
+def classify_directory(
+    directory: str,
+    classifier_kwargs: dict,
+    merged_output: Optional[str] = None,
+    workers: int = 1,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    max_memory_mb: Optional[int] = None,
+    long: bool = False,
+) -> Tuple[int, int]:
+    """Classifies the files of a directory with worker processes
+
+    Files are split into shards of shard_size files, and every worker loads its
+    own SentimentClassifier once and classifies whole shards at a time. As
+    shards complete, the parent writes out_<name> next to every file and
+    appends one JSON line per file to the merged output. Files that already
+    have an out_<name> counterpart are skipped, so reruns are incremental.
+
+    Args:
+        directory (str): The directory with the files to classify.
+        classifier_kwargs (dict): Arguments of SentimentClassifier in the workers.
+        merged_output (Optional[str], optional): JSONL file every result is
+            appended to. Defaults to None.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        shard_size (int, optional): Files per shard. Defaults to
+            DEFAULT_SHARD_SIZE.
+        max_memory_mb (Optional[int], optional): Peak resident memory of a
+            worker in MB. A worker over it after a shard is replaced by a new
+            one, so a single shard can still go over it (Unix only). Defaults
+            to None.
+        long (bool, optional): Classifies every file with predict_long.
+            Defaults to False.
+
+    Returns:
+        Tuple[int, int]: The number of files classified and failed.
+    """
+    
+    assert workers > 0, f"{workers} must be a positive number."
+    
+    paths = pending_files(directory, merged_output)
+    shards = [paths[first:first + shard_size] for first in range(0, len(paths), shard_size)]
+    if not shards:
+        return 0, 0
+    
+    # Spawned workers don't inherit any framework state from the parent
+    context = multiprocessing.get_context("spawn")
+    shard_queue, result_queue = context.Queue(), context.Queue()
+    for shard in shards:
+        shard_queue.put(shard)
+    # One end marker per worker: a retired worker leaves its marker to its replacement
+    num_workers = min(workers, len(shards))
+    for _ in range(num_workers):
+        shard_queue.put(None)
+    
+    def start_worker() -> multiprocessing.Process:
+        process = context.Process(
+            target=_directory_worker,
+            args=(classifier_kwargs, long, max_memory_mb, shard_queue, result_queue),
+            daemon=True,
+        )
+        process.start()
+        return process
+    
+    processes = [start_worker() for _ in range(num_workers)]
+    num_classified, num_failed, num_shards_done = 0, 0, 0
+    merged_f = open(merged_output, 'a', encoding="utf-8") if merged_output else None
+    try:
+        while num_shards_done < len(shards):
+            try:
+                results = result_queue.get(timeout=WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                crashed = [process for process in processes if process.exitcode not in (None, 0)]
+                if crashed:
+                    raise RuntimeError(f"A worker exited with code {crashed[0].exitcode}, its shard is lost")
+                continue
+            if results == _WORKER_RETIRED:
+                print(f"A worker went over {max_memory_mb}MB, starting a new one")
+                processes.append(start_worker())
+                continue
+            num_shards_done += 1
+            
+            for path, prediction, error in results:
+                if error is not None:
+                    print(f"Error: {path}: {error}")
+                    num_failed += 1
+                    continue
+                
+                out_file = os.path.join(os.path.dirname(path), f"out_{os.path.basename(path)}")
+                # Written atomically, so a file is only skipped on rerun once fully done
+                with open(f"{out_file}.tmp", 'w', encoding="utf-8") as f:
+                    f.write(str(prediction))
+                os.replace(f"{out_file}.tmp", out_file)
+                
+                if merged_f is not None:
+                    merged_f.write(json.dumps({"file": os.path.basename(path), **prediction}) + "\n")
+                num_classified += 1
+            if merged_f is not None:
+                merged_f.flush()
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        if merged_f is not None:
+            merged_f.close()
+        for process in processes:
+            process.join()
+    return num_classified, num_failed
+
+class PyTorchBackend:
+    """PyTorch specific steps of SentimentClassifier."""
+    
+    name = "pt"
+    tensors_type = "pt"
+    
+    def import_modules(self) -> None:
+        """Imports the framework and its transformers classes"""
+        
+        import torch
+        from transformers import AutoModelForSequenceClassification
+    
+    def configure(self, cpu: bool, intra_op_threads: Optional[int], inter_op_threads: Optional[int]) -> None:
+        """Sizes the thread pools, which must happen before the first operator runs"""
+        
+        import torch
+        
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        if inter_op_threads:
+            torch.set_num_interop_threads(inter_op_threads)
+    
+    def load_model(self, model_name: str, cpu: bool, quantize: bool) -> "PreTrainedModel":
+        """Loads the weights on the first GPU or the CPU, applying dynamic int8
+        quantization to the linear layers if asked"""
+        
+        import torch
+        from transformers import AutoModelForSequenceClassification
         
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
         LMmodel = AutoModelForSequenceClassification.from_pretrained(model_name)
-        return pipeline(task="text-classification", model=LMmodel, tokenizer=tokenizer, device=0)
+        if quantize:
+            LMmodel = torch.quantization.quantize_dynamic(LMmodel, {torch.nn.Linear}, dtype=torch.qint8)
+        return LMmodel.to("cpu" if cpu else "cuda:0")
+    
+    def forward(self, model: "PreTrainedModel", encoded: dict) -> List[List[float]]:
+        """Runs the model on a batch of encoded inputs and returns its logits"""
+        
+        import torch
+        
+        encoded = {name: tensor.to(model.device) for name, tensor in encoded.items()}
+        with torch.no_grad():
+            return model(**encoded).logits.float().cpu().tolist()
+
+class TensorflowBackend:
+    """Tensorflow specific steps of SentimentClassifier."""
+    
+    name = "tf"
+    tensors_type = "tf"
+    
+    def import_modules(self) -> None:
+        """Imports the framework and its transformers classes"""
+        
+        import tensorflow
+        from transformers import TFAutoModelForSequenceClassification
+    
+    def configure(self, cpu: bool, intra_op_threads: Optional[int], inter_op_threads: Optional[int]) -> None:
+        """Hides the GPUs and sizes the thread pools, which must happen before Tensorflow initializes"""
+        
+        import tensorflow as tf
+        
+        if cpu:
+            tf.config.set_visible_devices([], "GPU")
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    
+    def load_model(self, model_name: str, cpu: bool, quantize: bool) -> "TFPreTrainedModel":
+        """Loads the weights, placed by Tensorflow on the devices configure left visible.
+        Dynamic quantization has no in-process Keras equivalent, see SentimentClassifier"""
+        
+        from transformers import TFAutoModelForSequenceClassification
+        
+        return TFAutoModelForSequenceClassification.from_pretrained(model_name)
+    
+    def forward(self, model: "TFPreTrainedModel", encoded: dict) -> List[List[float]]:
+        """Runs the model on a batch of encoded inputs and returns its logits"""
+        
+        return model(dict(encoded)).logits.numpy().tolist()
+
+# Available backends of SentimentClassifier by name
+BACKENDS = {backend.name: backend for backend in (PyTorchBackend, TensorflowBackend)}
+
+class SentimentClassifier:
+    
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "pt",
+        cpu: bool = False,
+        quantize: bool = False,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None,
+        cache: Optional[PredictionCache] = None,
+        warmup: bool = False,
+    ) -> None:
+        """Initializes a Sentiment Classifier
+
+        Args:
+            model_name (str): Path or name of the model to load.
+            backend (str, optional): "pt" for PyTorch or "tf" for Tensorflow.
+                Defaults to "pt".
+            cpu (bool, optional): Runs the model on CPU instead of the first
+                GPU. Defaults to False.
+            quantize (bool, optional): Applies dynamic int8 quantization to the
+                linear layers. Only available on CPU with the PyTorch backend.
+                Defaults to False.
+            intra_op_threads (Optional[int], optional): Threads used inside a
+                single operator. Defaults to the framework default.
+            inter_op_threads (Optional[int], optional): Threads used to run
+                independent operators in parallel. Defaults to the framework default.
+            cache (Optional[PredictionCache], optional): Cache consulted by
+                predict and predict_batch before running the model. Defaults
+                to None (no cache).
+            warmup (bool, optional): Runs a dummy prediction once loaded. See
+                warmup. Defaults to False.
+        """
+        
+        assert backend in BACKENDS, f"Invalid backend: {backend}. Must be one of {list(BACKENDS)}."
+        assert cpu or not quantize, "Error: Dynamic quantization is only available on CPU."
+        assert backend == "pt" or not quantize, "Error: Dynamic quantization is only available with the PyTorch backend."
+        self._backend = BACKENDS[backend]()
+        
+        self.startup_timings = {}
+        with self._timed("import"):
+            self._backend.import_modules()
+            from transformers import AutoTokenizer
+        
+        self._backend.configure(cpu, intra_op_threads, inter_op_threads)
+        
+        self._cache = cache
+        # Filled by predict_pipelined, all zeros until it runs
+        self.pipeline_timings = self._empty_pipeline_timings()
+        with self._timed("tokenizer"):
+            self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # The model is called directly rather than through a transformers
+        # pipeline, which would cost an extra import and a setup at startup
+        with self._timed("weights"):
+            self._model = self._backend.load_model(model_name, cpu, quantize)
+        
+        if warmup:
+            self.warmup()
+        
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        """Adds the elapsed time of a block to the startup timings"""
+        
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[stage] = self.startup_timings.get(stage, 0.0) + time.perf_counter() - start
+    
+    @staticmethod
+    def _empty_pipeline_timings() -> Dict[str, dict]:
+        """The per-stage counters of predict_pipelined before any batch"""
+        
+        return {
+            stage: {"busy": 0.0, "idle": 0.0, "blocked": 0.0, "batches": 0}
+            for stage in ("tokenize", "forward", "postprocess")
+        }
+    
+    def warmup(self) -> None:
+        """Runs a dummy prediction so one-off initialization (kernel selection,
+        graph tracing, memory allocation) happens before the first real input"""
+        
+        with self._timed("warmup"):
+            self._predict_batch([WARMUP_TEXT], DEFAULT_MAX_BATCH_TOKENS)
+    
+    @property
+    def cache_stats(self) -> Optional[dict]:
+        """The hit and miss counters of the prediction cache, None without cache"""
+        
+        return self._cache.stats() if self._cache is not None else None
     
     def predict(self, text: str) -> dict:
         """Predicts the sentiment of a text"""
         
-        result = self._model(text)[0]
-        return {"label": result["label"], "score": result["score"]}
+        if self._cache is not None:
+            cached = self._cache.get(text)
+            if cached is not None:
+                return cached
+        
+        prediction = self._predict_batch([text], DEFAULT_MAX_BATCH_TOKENS)[0]
+        if self._cache is not None:
+            self._cache.put(text, prediction)
+        return prediction
+    
+    def predict_batch(self, texts: List[str], max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS) -> List[dict]:
+        """Predicts the sentiment of many texts using length-bucketed batches
 
-if __name__ == "__main__":
+        Args:
+            texts (List[str]): The texts to classify.
+            max_batch_tokens (int, optional): Maximum padded tokens per forward
+                pass. Defaults to DEFAULT_MAX_BATCH_TOKENS.
+
+        Returns:
+            List[dict]: One prediction per text, in the order of ``texts``.
+        """
+        
+        if self._cache is None:
+            return self._predict_batch(texts, max_batch_tokens)
+        
+        predictions = [None] * len(texts)
+        for i, prediction in self._cache.get_many(texts).items():
+            predictions[i] = prediction
+        
+        # Duplicated texts that miss the cache go through the model only once
+        missing = {}
+        for i, prediction in enumerate(predictions):
+            if prediction is None:
+                missing.setdefault(texts[i], []).append(i)
+        if missing:
+            missing_texts = list(missing)
+            computed = self._predict_batch(missing_texts, max_batch_tokens)
+            self._cache.put_many(missing_texts, computed)
+            for text, prediction in zip(missing_texts, computed):
+                for i in missing[text]:
+                    predictions[i] = dict(prediction)
+        return predictions
+    
+    def _predict_batch(self, texts: List[str], max_batch_tokens: int) -> List[dict]:
+        """Runs the model on length-bucketed batches of texts"""
+        
+        if not texts:
+            return []
+        
+        # Tokenized once: the lengths fill the buckets and the ids are padded per bucket
+        max_length = min(self._tokenizer.model_max_length, MAX_MODEL_TOKENS)
+        encoded = self._tokenizer(list(texts), truncation=True, max_length=max_length)
+        lengths = [len(input_ids) for input_ids in encoded["input_ids"]]
+        
+        id2label = self._model.config.id2label
+        predictions = [None] * len(texts)
+        for batch in make_length_buckets(lengths, max_batch_tokens):
+            padded = self._tokenizer.pad(
+                {name: [values[i] for i in batch] for name, values in encoded.items()},
+                return_tensors=self._backend.tensors_type,
+            )
+            for i, logits in zip(batch, self._backend.forward(self._model, padded)):
+                predictions[i] = logits_to_prediction(logits, id2label)
+        return predictions
+    
+    def predict_long(
+        self,
+        text: str,
+        window_overlap: int = DEFAULT_WINDOW_OVERLAP,
+        reduction: str = "mean",
+        batch_size: int = DEFAULT_WINDOW_BATCH_SIZE,
+        return_windows: bool = False,
+    ) -> dict:
+        """Predicts the sentiment of a text longer than the model's window
+
+        The text is tokenized once and split into overlapping windows that fill
+        the model's maximum input length. The windows are scored in batches and
+        their scores are combined into a single label.
+
+        Args:
+            text (str): The text to classify.
+            window_overlap (int, optional): Tokens shared by two consecutive
+                windows. Defaults to DEFAULT_WINDOW_OVERLAP.
+            reduction (str, optional): "mean", "weighted" or "max". See
+                reduce_window_logits. Defaults to "mean".
+            batch_size (int, optional): Windows scored per forward pass.
+                Defaults to DEFAULT_WINDOW_BATCH_SIZE.
+            return_windows (bool, optional): Adds the character offsets and the
+                prediction of every window under "windows". Defaults to False.
+
+        Returns:
+            dict: The label and score of the whole text.
+        """
+        
+        assert reduction in REDUCTIONS, f"Invalid reduction: {reduction}. Must be one of {REDUCTIONS}."
+        max_length = min(self._tokenizer.model_max_length, MAX_MODEL_TOKENS)
+        assert 0 <= window_overlap < max_length - self._tokenizer.num_special_tokens_to_add(), (
+            f"{window_overlap} must be smaller than the window size."
+        )
+        
+        # A single tokenizer call splits the whole text into overlapping windows
+        encoded = self._tokenizer(
+            text,
+            truncation=True,
+            max_length=max_length,
+            stride=window_overlap,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True,
+        )
+        windows = [
+            [(start, end) for start, end in offsets if end > start]
+            for offsets in encoded["offset_mapping"]
+        ]
+        
+        window_logits = []
+        for first in range(0, len(windows), batch_size):
+            batch = self._tokenizer.pad(
+                {
+                    "input_ids": encoded["input_ids"][first:first + batch_size],
+                    "attention_mask": encoded["attention_mask"][first:first + batch_size],
+                },
+                return_tensors=self._backend.tensors_type,
+            )
+            window_logits.extend(self._backend.forward(self._model, batch))
+        
+        id2label = self._model.config.id2label
+        probabilities = reduce_window_logits(window_logits, [len(tokens) for tokens in windows], reduction)
+        best = max(range(len(probabilities)), key=lambda label: probabilities[label])
+        prediction = {"label": id2label[best], "score": probabilities[best]}
+        
+        if return_windows:
+            prediction["windows"] = []
+            for tokens, logits in zip(windows, window_logits):
+                window_probabilities = softmax(logits)
+                window_best = max(range(len(window_probabilities)), key=lambda label: window_probabilities[label])
+                prediction["windows"].append({
+                    "start": tokens[0][0] if tokens else 0,
+                    "end": tokens[-1][1] if tokens else 0,
+                    "label": id2label[window_best], "score": window_probabilities[window_best],
+                })
+        return prediction
+    
+    def predict_pipelined(
+        self,
+        texts: Iterable[str],
+        batch_size: int = DEFAULT_PIPELINE_BATCH_SIZE,
+        queue_size: int = DEFAULT_PIPELINE_QUEUE_SIZE,
+    ) -> Iterator[dict]:
+        """Predicts the sentiment of many texts overlapping tokenization and inference
+
+        Tokenization, the forward pass and post-processing run in their own
+        threads connected by bounded queues, so the tokenizer encodes the next
+        batches and the previous logits are turned into labels while the model
+        runs. Both the tokenizer and the frameworks release the GIL in their
+        heavy work. Texts found in the prediction cache skip the tokenizer and
+        the model, and the computed predictions are added to it. The time every
+        stage spends working, waiting for input (idle) and waiting for room
+        downstream (blocked) is kept in pipeline_timings: the bottleneck is the
+        stage that is never idle nor blocked.
+
+        Args:
+            texts (Iterable[str]): The texts to classify, read lazily.
+            batch_size (int, optional): Texts per forward pass. Defaults to
+                DEFAULT_PIPELINE_BATCH_SIZE.
+            queue_size (int, optional): Batches buffered between two stages.
+                Defaults to DEFAULT_PIPELINE_QUEUE_SIZE.
+
+        Yields:
+            dict: One prediction per text, in the order of ``texts``.
+        """
+        
+        assert queue_size > 0, f"{queue_size} must be a positive number."
+        
+        self.pipeline_timings = self._empty_pipeline_timings()
+        id2label = self._model.config.id2label
+        stop = threading.Event()
+        encoded_queue = queue.Queue(queue_size)
+        logits_queue = queue.Queue(queue_size)
+        output_queue = queue.Queue(queue_size)
+        
+        def tokenize(batch: List[str]):
+            cached = self._cache.get_many(batch) if self._cache is not None else {}
+            # Duplicated texts that miss the cache go through the model only once
+            missing = list(dict.fromkeys(text for i, text in enumerate(batch) if i not in cached))
+            encoded = None
+            if missing:
+                encoded = self._tokenizer(missing, padding=True, truncation=True, return_tensors=self._backend.tensors_type)
+            return batch, cached, missing, encoded
+        
+        def forward(item):
+            batch, cached, missing, encoded = item
+            logits = self._backend.forward(self._model, encoded) if missing else []
+            return batch, cached, missing, logits
+        
+        def postprocess(item) -> List[dict]:
+            batch, cached, missing, logits = item
+            computed = {text: logits_to_prediction(text_logits, id2label) for text, text_logits in zip(missing, logits)}
+            if self._cache is not None and computed:
+                self._cache.put_many(list(computed), list(computed.values()))
+            return [cached[i] if i in cached else dict(computed[text]) for i, text in enumerate(batch)]
+        
+        def run_stage(name: str, source, work, sink: queue.Queue) -> None:
+            timings = self.pipeline_timings[name]
+            try:
+                while True:
+                    start = time.perf_counter()
+                    item = source()
+                    received = time.perf_counter()
+                    timings["idle"] += received - start
+                    if item is _PIPELINE_END or isinstance(item, _PipelineFailure):
+                        _queue_put(sink, item, stop)
+                        return
+                    
+                    result = work(item)
+                    done = time.perf_counter()
+                    timings["busy"] += done - received
+                    timings["batches"] += 1
+                    
+                    if not _queue_put(sink, result, stop):
+                        return
+                    timings["blocked"] += time.perf_counter() - done
+            except Exception as e:
+                _queue_put(sink, _PipelineFailure(e), stop)
+        
+        batches = batched(texts, batch_size)
+        stages = [
+            ("tokenize", lambda: next(batches, _PIPELINE_END), tokenize, encoded_queue),
+            ("forward", lambda: _queue_get(encoded_queue, stop), forward, logits_queue),
+            ("postprocess", lambda: _queue_get(logits_queue, stop), postprocess, output_queue),
+        ]
+        threads = [threading.Thread(target=run_stage, args=stage, daemon=True) for stage in stages]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            while True:
+                item = output_queue.get()
+                if item is _PIPELINE_END:
+                    return
+                if isinstance(item, _PipelineFailure):
+                    raise item.error
+                yield from item
+        finally:
+            # Also reached when the caller stops iterating early
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+def main(default_backend: str = "pt") -> None:
+    """Command line entry point of the classifier"""
+    
     parser = argparse.ArgumentParser()
     parser.add_argument("--text", required=False, type=str, help="The text to classify")
     parser.add_argument("--file", required=False, type=str, help="A file with text to classify")
+    parser.add_argument("--dir", required=False, type=str, help="A directory whose files are classified by a process pool")
+    parser.add_argument("--workers", default=1, type=int, help="Worker processes in directory mode")
+    parser.add_argument("--shard-size", default=DEFAULT_SHARD_SIZE, type=int, help="Files classified at once by a worker")
+    parser.add_argument("--max-memory-mb", required=False, type=int, help="Peak resident memory after which a worker is replaced (Unix only)")
+    parser.add_argument("--merged-output", required=False, type=str, help="JSONL file collecting every result of directory mode")
+    parser.add_argument("--stream", action="store_true", help="Classify every line of --file and write one JSON result per line")
+    parser.add_argument("--format", default="lines", choices=["lines", "jsonl"], help="Input format in streaming mode")
+    parser.add_argument("--text-field", default="text", type=str, help="Key holding the text of a JSONL record")
+    parser.add_argument("--batch-size", default=DEFAULT_STREAM_BATCH_SIZE, type=int, help="Texts classified at once in streaming mode")
+    parser.add_argument("--pipelined", action="store_true", help="Overlap tokenization and inference in streaming mode")
+    parser.add_argument("--long", action="store_true", help="Classify texts longer than the model's window with sliding windows")
+    parser.add_argument("--window-overlap", default=DEFAULT_WINDOW_OVERLAP, type=int, help="Tokens shared by consecutive windows")
+    parser.add_argument("--reduction", default="mean", choices=REDUCTIONS, help="How window scores are combined")
+    parser.add_argument("--return-windows", action="store_true", help="Also print the prediction of every window")
+    parser.add_argument("--cache", required=False, type=str, help="SQLite file caching predictions across runs")
+    parser.add_argument("--cache-max-entries", default=1000000, type=int, help="Maximum cached predictions on disk")
+    parser.add_argument("--cache-max-age", required=False, type=float, help="Seconds a cached prediction stays valid")
+    parser.add_argument("--warmup", action="store_true", help="Run a dummy prediction before the real input")
+    parser.add_argument("--startup-report", action="store_true", help="Print where the time to first prediction goes")
+    parser.add_argument("--backend", default=default_backend, choices=list(BACKENDS), help="Deep learning framework running the model")
+    parser.add_argument("--cpu", action="store_true", help="Run the model on CPU")
+    parser.add_argument("--quantize", action="store_true", help="Apply dynamic int8 quantization (requires --cpu)")
+    parser.add_argument("--intra-op-threads", required=False, type=int, help="Threads used inside an operator")
+    parser.add_argument("--inter-op-threads", required=False, type=int, help="Threads used across operators")
     args = parser.parse_args()
     
-    assert args.text or args.file, "Error: A file or input text must be provided."
+    assert args.text or args.file or args.dir, "Error: A file, directory or input text must be provided."
+    assert args.file or not args.stream, "Error: Streaming mode requires a file."
+    assert not (args.dir and args.cache), "Error: The cache is not shared by directory mode workers."
+    assert args.cpu or not args.quantize, "Error: Dynamic quantization is only available on CPU."
+    assert args.backend == "pt" or not args.quantize, "Error: Dynamic quantization is only available with the PyTorch backend."
     
-    if args.text:
-        input_text = args.text
-    else:
-        with open(args.file, 'r', encoding="utf-8") as input_f:
-            input_text = input_f.read()
+    if args.dir:
+        classifier_kwargs = {
+            "model_name": MODEL_NAME,
+            "backend": args.backend,
+            "cpu": args.cpu,
+            "intra_op_threads": args.intra_op_threads,
+            "inter_op_threads": args.inter_op_threads,
+        }
+        if args.quantize:
+            classifier_kwargs["quantize"] = True
+        num_classified, num_failed = classify_directory(
+            args.dir, classifier_kwargs, args.merged_output, args.workers, args.shard_size, args.max_memory_mb, args.long
+        )
+        print(f"Classified {num_classified} files, {num_failed} failed")
+        sys.exit(1 if num_failed else 0)
+    
+    cache = None
+    if args.cache:
+        cache = PredictionCache(
+            args.cache,
+            MODEL_NAME,
+            backend=args.backend,
+            quantize=args.quantize,
+            max_entries=args.cache_max_entries,
+            max_age=args.cache_max_age,
+        )
     
-    sentiment_classifier = SentimentClassifier(r"./models/distilbert-base-uncased-finetuned-sst-2-english")
-    prediction = sentiment_classifier.predict(input_text)
-    print(prediction)
+    sentiment_classifier = SentimentClassifier(
+        MODEL_NAME,
+        backend=args.backend,
+        cpu=args.cpu,
+        quantize=args.quantize,
+        intra_op_threads=args.intra_op_threads,
+        inter_op_threads=args.inter_op_threads,
+        cache=cache,
+        warmup=args.warmup,
+    )
+    startup_timings = dict(sentiment_classifier.startup_timings)
     
     if args.file:
         out_path = os.path.dirname(args.file)
         out_filename = f"out_{os.path.basename(args.file)}"
         out_file = os.path.join(out_path, out_filename)
-        with open(out_file, 'w', encoding="utf-8") as f:
-            f.write(str(prediction))
\ No newline at end of file
+    
+    if args.stream:
+        num_classified, num_failed = classify_stream(
+            sentiment_classifier, args.file, out_file, args.format, args.text_field, args.batch_size, args.pipelined
+        )
+        print(f"Classified {num_classified} texts into {out_file}, {num_failed} lines failed")
+        if args.pipelined:
+            print("Pipeline stages (s):")
+            for stage, timings in sentiment_classifier.pipeline_timings.items():
+                print(
+                    f"  {stage:<12} busy {timings['busy']:8.3f} - idle {timings['idle']:8.3f} - "
+                    f"blocked {timings['blocked']:8.3f} - batches {timings['batches']}"
+                )
+    else:
+        if args.text:
+            input_text = args.text
+        else:
+            with open(args.file, 'r', encoding="utf-8") as input_f:
+                input_text = input_f.read()
+        
+        start = time.perf_counter()
+        if args.long:
+            prediction = sentiment_classifier.predict_long(
+                input_text, args.window_overlap, args.reduction, return_windows=args.return_windows
+            )
+        else:
+            prediction = sentiment_classifier.predict(input_text)
+        startup_timings["first_inference"] = time.perf_counter() - start
+        startup_timings["time_to_first_prediction"] = process_uptime()
+        print(prediction)
+        
+        if args.file:
+            with open(out_file, 'w', encoding="utf-8") as f:
+                f.write(str(prediction))
+    
+    if args.startup_report:
+        print("Startup report (ms):")
+        for stage, seconds in startup_timings.items():
+            print(f"  {stage:<25} {seconds * 1000:10.1f}")
+    
+    if cache is not None:
+        print(f"Cache: {sentiment_classifier.cache_stats}")
+        cache.close()
+
+if __name__ == "__main__":
+    main()
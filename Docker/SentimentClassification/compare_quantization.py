@@ -0,0 +1,72 @@
+import argparse
+import statistics
+import time
+
+from classify import MODEL_NAME, SentimentClassifier
+
+def load_samples(file: str) -> list:
+    """Loads one text per line, optionally followed by a tab and its expected label"""
+    
+    samples = []
+    with open(file, 'r', encoding="utf-8") as input_f:
+        for line in input_f:
+            text, _, label = line.rstrip("\n").partition("\t")
+            if text.strip():
+                samples.append((text, label.strip().upper() or None))
+    return samples
+
+def run(sentiment_classifier: SentimentClassifier, texts: list) -> tuple:
+    """Classifies every text on its own and returns the predictions and latencies in ms"""
+    
+    # Warm-up pass so one-off initialization is not counted
+    sentiment_classifier.predict(texts[0])
+    
+    predictions, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        predictions.append(sentiment_classifier.predict(text))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return predictions, latencies
+
+def summarize(name: str, predictions: list, latencies: list, labels: list) -> None:
+    """Prints the latency percentiles and, if labels are known, the accuracy"""
+    
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    line = f"{name}: mean {statistics.mean(latencies):.2f}ms - p50 {statistics.median(latencies):.2f}ms - p95 {p95:.2f}ms"
+    known = [(p, l) for p, l in zip(predictions, labels) if l]
+    if known:
+        accuracy = sum(p["label"] == l for p, l in known) / len(known)
+        line += f" - accuracy {accuracy:.2%} ({len(known)} labelled)"
+    print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the fp32 and dynamic int8 models on CPU")
+    parser.add_argument("--file", default="data/input_file.txt", type=str, help="A file with one text per line (optionally 'text<TAB>LABEL')")
+    parser.add_argument("--intra-op-threads", required=False, type=int, help="Threads used inside an operator")
+    parser.add_argument("--inter-op-threads", required=False, type=int, help="Threads used across operators")
+    args = parser.parse_args()
+    
+    samples = load_samples(args.file)
+    assert samples, f"Error: {args.file} has no text to classify."
+    texts = [text for text, _ in samples]
+    labels = [label for _, label in samples]
+    
+    # Thread pools are process-wide, so they are configured by the first classifier only
+    fp32_classifier = SentimentClassifier(
+        MODEL_NAME, cpu=True, intra_op_threads=args.intra_op_threads, inter_op_threads=args.inter_op_threads
+    )
+    int8_classifier = SentimentClassifier(MODEL_NAME, cpu=True, quantize=True)
+    
+    fp32_predictions, fp32_latencies = run(fp32_classifier, texts)
+    int8_predictions, int8_latencies = run(int8_classifier, texts)
+    
+    summarize("fp32", fp32_predictions, fp32_latencies, labels)
+    summarize("int8", int8_predictions, int8_latencies, labels)
+    
+    agreement = sum(a["label"] == b["label"] for a, b in zip(fp32_predictions, int8_predictions)) / len(texts)
+    score_delta = statistics.mean(
+        abs(a["score"] - b["score"]) for a, b in zip(fp32_predictions, int8_predictions) if a["label"] == b["label"]
+    ) if agreement else float("nan")
+    speed_up = statistics.mean(fp32_latencies) / statistics.mean(int8_latencies)
+    print(f"Label agreement: {agreement:.2%} - Mean score delta: {score_delta:.4f} - Speed-up: {speed_up:.2f}x")
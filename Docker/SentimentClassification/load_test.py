@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+from benchmark_utils import WORDS, percentile
+
+async def open_connection(args: argparse.Namespace):
+    """Opens a connection to the server over TCP or a Unix socket"""
+
+    if args.unix_socket:
+        return await asyncio.open_unix_connection(args.unix_socket)
+    return await asyncio.open_connection(args.host, args.port)
+
+async def client(args: argparse.Namespace, deadline: float, latencies: List[float], errors: List[int]) -> None:
+    """Sends requests one after another over a keep-alive connection until the deadline"""
+
+    rng = random.Random()
+    reader, writer = await open_connection(args)
+    try:
+        while time.perf_counter() < deadline:
+            text = " ".join(rng.choices(WORDS, k=rng.randint(args.min_words, args.max_words)))
+            body = json.dumps({"text": text}).encode("utf-8")
+            request = (
+                f"POST /predict HTTP/1.1\r\nHost: {args.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1") + body
+
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            elapsed = time.perf_counter() - start
+
+            if status_line.startswith(b"HTTP/1.1 200"):
+                latencies.append(elapsed)
+            else:
+                errors.append(1)
+    finally:
+        writer.close()
+
+async def main(args: argparse.Namespace) -> None:
+    """Runs the concurrent clients and prints the latency and throughput report"""
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(client(args, deadline, latencies, errors) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    assert latencies, "Error: No request succeeded."
+    latencies.sort()
+    print(f"Requests: {len(latencies)} ok, {len(errors)} failed in {elapsed:.1f}s with {args.concurrency} clients")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(
+        f"Latency: p50 {percentile(latencies, 0.50) * 1000:.1f}ms - "
+        f"p95 {percentile(latencies, 0.95) * 1000:.1f}ms - "
+        f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms - "
+        f"max {latencies[-1] * 1000:.1f}ms"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for server.py")
+    parser.add_argument("--host", default="127.0.0.1", type=str, help="Server address")
+    parser.add_argument("--port", default=8000, type=int, help="Server port")
+    parser.add_argument("--unix-socket", required=False, type=str, help="Connect to a Unix socket instead of TCP")
+    parser.add_argument("--concurrency", default=16, type=int, help="Number of concurrent clients")
+    parser.add_argument("--duration", default=10.0, type=float, help="Seconds to generate load for")
+    parser.add_argument("--min-words", default=3, type=int, help="Minimum words per text")
+    parser.add_argument("--max-words", default=60, type=int, help="Maximum words per text")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,244 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Puts between two disk eviction passes
+EVICTION_INTERVAL = 1000
+
+def normalize_text(text: str) -> str:
+    """Normalizes a text so trivially different copies share a cache entry"""
+
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def model_identity(model_name: str, backend: str = "pt", quantize: bool = False) -> str:
+    """Fingerprints a model configuration so the cache is invalidated when it changes
+
+    For a local model directory the fingerprint covers the relative path, size
+    and modification time of every file, so replacing any weight, config or
+    vocabulary file yields a new identity. Hub model names are used as is. The
+    backend and the quantization are part of it too, since they change the
+    scores of the same weights.
+
+    Args:
+        model_name (str): Path or name of the model.
+        backend (str, optional): "pt" or "tf". Defaults to "pt".
+        quantize (bool, optional): Whether dynamic int8 quantization is
+            applied. Defaults to False.
+
+    Returns:
+        str: A hex digest identifying the model configuration.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(f"{model_name}\0{backend}\0{int(quantize)}\n".encode("utf-8"))
+    if os.path.isdir(model_name):
+        for root, dirs, files in os.walk(model_name):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                digest.update(f"{os.path.relpath(path, model_name)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    else:
+        digest.update(model_name.encode("utf-8"))
+    return digest.hexdigest()
+
+class PredictionCache:
+    """An in-memory LRU in front of a persistent SQLite store of predictions."""
+
+    def __init__(
+        self,
+        path: str,
+        model_name: str,
+        backend: str = "pt",
+        quantize: bool = False,
+        memory_entries: int = 10000,
+        max_entries: int = 1000000,
+        max_age: Optional[float] = None,
+    ) -> None:
+        """Constructor.
+
+        Args:
+            path (str): The SQLite file holding the cache.
+            model_name (str): Path or name of the model whose predictions are
+                cached.
+            backend (str, optional): Backend running the model. Defaults to "pt".
+            quantize (bool, optional): Whether the model is quantized.
+                Defaults to False.
+            memory_entries (int, optional): Size of the in-memory LRU.
+                Defaults to 10000.
+            max_entries (int, optional): Maximum entries kept on disk, the
+                least recently used are evicted first. Defaults to 1000000.
+            max_age (Optional[float], optional): Seconds an entry stays valid.
+                Defaults to None (never expires).
+        """
+
+        assert memory_entries >= 0, f"{memory_entries} must be a non-negative number."
+        assert max_entries > 0, f"{max_entries} must be a positive number."
+        self._model_id = model_identity(model_name, backend, quantize)
+        self._memory_entries = memory_entries
+        self._max_entries = max_entries
+        self._max_age = max_age
+        self._memory: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, model_id TEXT NOT NULL, label TEXT NOT NULL, score REAL NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_predictions_accessed ON predictions (accessed)")
+        # Entries of other configurations share the file and are kept, so
+        # switching back and forth doesn't wipe the cache. The ones of a
+        # replaced model are never read again and age out through evict()
+        self.evict()
+
+    def key(self, text: str) -> str:
+        """Builds the content address of a text for the current model"""
+
+        payload = f"{self._model_id}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        """Checks if an entry created at the given time is too old"""
+
+        return self._max_age is not None and now - created > self._max_age
+
+    def _remember(self, key: str, prediction: dict, created: float) -> None:
+        """Puts an entry into the in-memory LRU"""
+
+        if not self._memory_entries:
+            return
+        self._memory[key] = (prediction, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: List[str]) -> Dict[int, dict]:
+        """Looks up the predictions of many texts
+
+        Args:
+            texts (List[str]): The texts to look up.
+
+        Returns:
+            Dict[int, dict]: The cached predictions by index into ``texts``.
+        """
+
+        now = time.time()
+        found = {}
+        with self._lock:
+            keys = [self.key(text) for text in texts]
+            pending = {}
+            for i, key in enumerate(keys):
+                entry = self._memory.get(key)
+                if entry is not None and not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    found[i] = dict(entry[0])
+                    self.memory_hits += 1
+                else:
+                    pending.setdefault(key, []).append(i)
+
+            pending_keys = list(pending)
+            hit_keys = []
+            # Stay well below SQLite's limit of bound parameters per statement
+            for first in range(0, len(pending_keys), 500):
+                chunk = pending_keys[first:first + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, label, score, created FROM predictions WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, label, score, created in rows:
+                    if self._expired(created, now):
+                        continue
+                    prediction = {"label": label, "score": score}
+                    self._remember(key, prediction, created)
+                    hit_keys.append(key)
+                    for i in pending[key]:
+                        found[i] = dict(prediction)
+                        self.disk_hits += 1
+
+            if hit_keys:
+                self._conn.executemany("UPDATE predictions SET accessed = ? WHERE key = ?", [(now, key) for key in hit_keys])
+                self._conn.commit()
+            self.misses += len(texts) - len(found)
+        return found
+
+    def get(self, text: str) -> Optional[dict]:
+        """Looks up the prediction of a text, None if it isn't cached"""
+
+        return self.get_many([text]).get(0)
+
+    def put_many(self, texts: List[str], predictions: List[dict]) -> None:
+        """Stores the predictions of many texts
+
+        Args:
+            texts (List[str]): The classified texts.
+            predictions (List[dict]): Their predictions, in the same order.
+        """
+
+        now = time.time()
+        with self._lock:
+            rows = []
+            for text, prediction in zip(texts, predictions):
+                key = self.key(text)
+                self._remember(key, {"label": prediction["label"], "score": prediction["score"]}, now)
+                rows.append((key, self._model_id, prediction["label"], prediction["score"], now, now))
+            self._conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+            self._puts += len(rows)
+            run_eviction = self._puts >= EVICTION_INTERVAL
+        if run_eviction:
+            self.evict()
+
+    def put(self, text: str, prediction: dict) -> None:
+        """Stores the prediction of a text"""
+
+        self.put_many([text], [prediction])
+
+    def evict(self) -> None:
+        """Drops expired entries and the least recently used beyond max_entries"""
+
+        with self._lock:
+            if self._max_age is not None:
+                self._conn.execute("DELETE FROM predictions WHERE created < ?", (time.time() - self._max_age,))
+            self._conn.execute(
+                "DELETE FROM predictions WHERE key IN ("
+                "SELECT key FROM predictions ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+            self._conn.commit()
+            self._puts = 0
+
+    def stats(self) -> dict:
+        """Returns the hit and miss counters and the number of entries"""
+
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+    def close(self) -> None:
+        """Closes the SQLite store"""
+
+        with self._lock:
+            self._conn.close()
@@ -14,6 +14,24 @@
 @REM --mount type=bind,source=C:\Users\Ana\Documents\Formacion\Tutorials\tutorials\Docker\SentimentClassification\data,target=/usr/src/sentiment_analysis/data ^
 @REM sentiment_classification:0.0.1 --text "I love you"
 
+@REM Run the Pytorch image on CPU-only nodes with int8 quantization
+@REM docker run -it ^
+@REM --rm ^
+@REM --name sentiment_classificator_torch ^
+@REM --mount type=bind,source=C:\Users\Ana\Documents\Formacion\Tutorials\tutorials\Docker\SentimentClassification\data,target=/usr/src/sentiment_analysis/data ^
+@REM sentiment_classification:0.0.1 --file data/input_file.txt --cpu --quantize --intra-op-threads 4 --inter-op-threads 1
+
+@REM Run the Pytorch image as a long-running inference server
+@REM docker run -d ^
+@REM --name sentiment_server_torch ^
+@REM --gpus=all ^
+@REM -p 8000:8000 ^
+@REM --health-cmd "python3 server.py --probe" ^
+@REM --health-interval 10s ^
+@REM --health-start-period 60s ^
+@REM --entrypoint python3 ^
+@REM sentiment_classification:0.0.1 server.py --max-batch-size 32 --max-wait-ms 5
+
 @REM Run the Tensorflow image
 @REM docker run -it ^
 @REM --rm ^
@@ -22,6 +40,17 @@
 @REM --mount type=bind,source=C:\Users\Ana\Documents\Formacion\Tutorials\tutorials\Docker\SentimentClassification\data,target=/usr/src/sentiment_analysis/data ^
 @REM sentiment_classification_tensorflow:0.0.1 --file data/input_file.txt
 
+@REM Run the Tensorflow image as a long-running inference server
+@REM docker run -d ^
+@REM --name sentiment_server_tf ^
+@REM --gpus=all ^
+@REM -p 8000:8000 ^
+@REM --health-cmd "python3 server_tf.py --probe" ^
+@REM --health-interval 10s ^
+@REM --health-start-period 60s ^
+@REM --entrypoint python3 ^
+@REM sentiment_classification_tensorflow:0.0.1 server_tf.py --max-batch-size 32 --max-wait-ms 5
+
 @REM Run the Tensorflow image with text
 docker run -it ^
 --rm ^
@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+STATUS_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class RequestError(Exception):
+    """A request that can't be parsed, answered with the given status."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+class MicroBatcher:
+    """Collects concurrent requests into micro-batches for the classifier."""
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 5.0) -> None:
+        """Constructor.
+
+        Args:
+            max_batch_size (int, optional): Maximum texts per model call.
+                Defaults to 32.
+            max_wait_ms (float, optional): Maximum time the first text of a
+                batch waits for others to join. Defaults to 5.0.
+        """
+
+        assert max_batch_size > 0, f"{max_batch_size} must be a positive number."
+        assert max_wait_ms >= 0, f"{max_wait_ms} must be a non-negative number."
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        # The model runs on a single thread so batches never compete for it
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.sentiment_classifier = None
+        self.batches = 0
+        self.texts = 0
+
+    @property
+    def ready(self) -> bool:
+        """Whether the model is loaded and requests can be served"""
+
+        return self.sentiment_classifier is not None
+
+    async def load(self, **classifier_kwargs) -> None:
+        """Loads and warms up the classifier off the event loop so liveness probes keep answering"""
+
+        from classify import MODEL_NAME, SentimentClassifier
+
+        loop = asyncio.get_running_loop()
+        self.sentiment_classifier = await loop.run_in_executor(
+            self._executor, lambda: SentimentClassifier(MODEL_NAME, warmup=True, **classifier_kwargs)
+        )
+
+    async def submit(self, texts: List[str]) -> List[dict]:
+        """Queues texts for classification and waits for their predictions"""
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            await self._queue.put((text, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def run(self) -> None:
+        """Forms batches until max_batch_size or max_wait_ms is reached and classifies them"""
+
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                predictions = await loop.run_in_executor(
+                    self._executor, self.sentiment_classifier.predict_batch, texts
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+            self.batches += 1
+            self.texts += len(batch)
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, dict, bytes]]:
+    """Reads one HTTP/1.1 request, None when the client closed the connection"""
+
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "Invalid Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise RequestError(413, "Payload too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+def write_response(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+    """Writes a JSON HTTP/1.1 response"""
+
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+async def route(batcher: MicroBatcher, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+    """Dispatches a request and returns the status and JSON payload"""
+
+    if path == "/healthz":
+        return 200, {"status": "alive"}
+    if path == "/readyz":
+        if batcher.ready:
+            return 200, {"status": "ready", "batches": batcher.batches, "texts": batcher.texts}
+        return 503, {"status": "loading"}
+    if path != "/predict":
+        return 404, {"error": f"Unknown path: {path}"}
+    if method != "POST":
+        return 405, {"error": "Use POST"}
+    if not batcher.ready:
+        return 503, {"error": "Model is loading"}
+
+    try:
+        request = json.loads(body)
+    except ValueError:
+        return 400, {"error": "Body must be JSON"}
+    if not isinstance(request, dict):
+        return 400, {"error": "Body must be a JSON object"}
+    if isinstance(request.get("text"), str):
+        return 200, (await batcher.submit([request["text"]]))[0]
+    texts = request.get("texts")
+    if isinstance(texts, list) and all(isinstance(text, str) for text in texts):
+        return 200, {"predictions": await batcher.submit(texts)}
+    return 400, {"error": "Expected {\"text\": str} or {\"texts\": [str, ...]}"}
+
+async def handle_connection(batcher: MicroBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Serves the requests of a keep-alive connection"""
+
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except RequestError as e:
+                write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            try:
+                status, payload = await route(batcher, method, path, body)
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(args: argparse.Namespace) -> None:
+    """Starts listening right away, then loads the model and serves forever"""
+
+    batcher = MicroBatcher(args.max_batch_size, args.max_wait_ms)
+    handler = lambda reader, writer: handle_connection(batcher, reader, writer)
+    if args.unix_socket:
+        server = await asyncio.start_unix_server(handler, path=args.unix_socket)
+        print(f"Listening on {args.unix_socket}", flush=True)
+    else:
+        server = await asyncio.start_server(handler, host=args.host, port=args.port)
+        print(f"Listening on http://{args.host}:{args.port}", flush=True)
+
+    batch_loop = asyncio.ensure_future(batcher.run())
+    start = time.perf_counter()
+    await batcher.load(backend=args.backend, cpu=args.cpu, quantize=args.quantize)
+    timings = " - ".join(
+        f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in batcher.sentiment_classifier.startup_timings.items()
+    )
+    print(f"Model loaded in {time.perf_counter() - start:.2f}s ({timings}), ready", flush=True)
+
+    async with server:
+        await asyncio.gather(server.serve_forever(), batch_loop)
+
+def probe(args: argparse.Namespace) -> bool:
+    """Checks the readiness endpoint, meant for Docker health checks"""
+
+    if args.unix_socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = args.unix_socket
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = ("127.0.0.1" if args.host == "0.0.0.0" else args.host, args.port)
+    try:
+        sock.settimeout(args.probe_timeout)
+        sock.connect(address)
+        sock.sendall(b"GET /readyz HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        return sock.recv(64).startswith(b"HTTP/1.1 200")
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def main(default_backend: str = "pt") -> None:
+    """Command line entry point of the server"""
+
+    parser = argparse.ArgumentParser(description="Serves SentimentClassifier over HTTP with micro-batching")
+    parser.add_argument("--host", default="0.0.0.0", type=str, help="Address to listen on")
+    parser.add_argument("--port", default=8000, type=int, help="Port to listen on")
+    parser.add_argument("--unix-socket", required=False, type=str, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--max-batch-size", default=32, type=int, help="Maximum texts per model call")
+    parser.add_argument("--max-wait-ms", default=5.0, type=float, help="Maximum time a text waits for its batch to fill")
+    parser.add_argument("--backend", default=default_backend, choices=["pt", "tf"], help="Deep learning framework running the model")
+    parser.add_argument("--cpu", action="store_true", help="Run the model on CPU")
+    parser.add_argument("--quantize", action="store_true", help="Apply dynamic int8 quantization (requires --cpu)")
+    parser.add_argument("--probe", action="store_true", help="Exit 0 if a running server is ready, 1 otherwise")
+    parser.add_argument("--probe-timeout", default=2.0, type=float, help="Seconds to wait for the probe")
+    args = parser.parse_args()
+
+    if args.probe:
+        sys.exit(0 if probe(args) else 1)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# Entry point of the inference server in the Tensorflow image. The server
+# lives in server.py, this script only selects its Tensorflow backend by default.
+from server import main
+
+if __name__ == "__main__":
+    main(default_backend="tf")
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from classify import make_length_buckets, read_records, reduce_window_logits, resume_point, softmax
+
+@pytest.mark.parametrize(
+    "lengths, max_batch_tokens, expected_batches",
+    [
+        ([], 100, []),
+        ([5, 3, 4], 100, [[1, 2, 0]]),
+        # 3 x 40 padded tokens exceed the budget
+        ([10, 40, 20, 40], 100, [[0, 2], [1, 3]]),
+        # Longer than the budget, alone in its batch
+        ([300, 10], 100, [[1], [0]]),
+    ],
+)
+def test_make_length_buckets(lengths, max_batch_tokens, expected_batches):
+    """Makes sure inputs are grouped by length under the token budget."""
+
+    # Act
+    batches = make_length_buckets(lengths, max_batch_tokens)
+
+    # Assert
+    assert expected_batches == batches
+
+def test_length_buckets_budget():
+    """Makes sure every batch padded to its longest input stays within the
+    budget and every input is in exactly one batch."""
+
+    # Arrange
+    lengths = [(i * 37) % 128 + 1 for i in range(500)]
+
+    # Act
+    batches = make_length_buckets(lengths, 1024)
+
+    # Assert
+    assert list(range(len(lengths))) == sorted(i for batch in batches for i in batch)
+    assert all(len(batch) * max(lengths[i] for i in batch) <= 1024 for batch in batches)
+
+def test_resume_point_missing_file(tmp_path):
+    """Makes sure a run without previous output starts from the first line."""
+
+    # Act
+    start_line = resume_point(str(tmp_path / "out.jsonl"))
+
+    # Assert
+    assert 0 == start_line
+
+def test_resume_point_truncates_partial_record(tmp_path):
+    """Makes sure a crashed run resumes after its last complete result and
+    its trailing partial record is removed."""
+
+    # Arrange
+    out_file = tmp_path / "out.jsonl"
+    complete = "".join(json.dumps({"line": line, "label": "POSITIVE"}) + "\n" for line in (0, 1, 3))
+    out_file.write_text(complete + '{"line": 4, "lab')
+
+    # Act
+    start_line = resume_point(str(out_file))
+
+    # Assert
+    assert 4 == start_line
+    assert complete == out_file.read_text()
+
+def test_read_records(tmp_path):
+    """Makes sure JSONL lines without a text are reported and reading goes on."""
+
+    # Arrange
+    input_file = tmp_path / "in.jsonl"
+    input_file.write_text('{"text": "skipped"}\n{"text": "good"}\n\n{"text": \n{"body": "x"}\n{"text": "last"}\n')
+
+    # Act
+    records = list(read_records(str(input_file), "jsonl", start_line=1))
+
+    # Assert
+    assert [(1, "good", None), (5, "last", None)] == [records[0], records[-1]]
+    assert [3, 4] == [line for line, text, error in records[1:-1] if text is None and error]
+
+@pytest.mark.parametrize(
+    "window_logits, reduction, expected_logits",
+    [
+        ([[0.0, 0.0], [2.0, 4.0]], "mean", [1.0, 2.0]),
+        # Weighted 3 to 1 by the window lengths
+        ([[0.0, 0.0], [2.0, 4.0]], "weighted", [0.5, 1.0]),
+        # The second window is the most confident
+        ([[0.0, 1.0], [0.0, 4.0]], "max", [0.0, 4.0]),
+    ],
+)
+def test_reduce_window_logits(window_logits, reduction, expected_logits):
+    """Makes sure the window logits are combined with the chosen reduction."""
+
+    # Act
+    probabilities = reduce_window_logits(window_logits, [300, 100], reduction)
+
+    # Assert
+    assert softmax(expected_logits) == pytest.approx(probabilities)
+
+def test_reduce_single_window():
+    """Makes sure a document with a single window keeps its probabilities."""
+
+    # Act
+    probabilities = [reduce_window_logits([[1.0, -1.0]], [42], reduction) for reduction in ("mean", "weighted", "max")]
+
+    # Assert
+    assert all(softmax([1.0, -1.0]) == pytest.approx(p) for p in probabilities)
@@ -0,0 +1,136 @@
+import os
+import time
+
+import pytest
+
+from prediction_cache import PredictionCache, model_identity
+
+POSITIVE = {"label": "POSITIVE", "score": 0.9}
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A local model directory with a config and weights"""
+
+    path = tmp_path / "model"
+    path.mkdir()
+    (path / "config.json").write_text("{}")
+    (path / "model.safetensors").write_bytes(b"weights")
+    return str(path)
+
+def test_model_identity_follows_files(model_dir):
+    """Makes sure replacing a file of the model gives a new identity."""
+
+    # Arrange
+    before = model_identity(model_dir)
+    weights = os.path.join(model_dir, "model.safetensors")
+
+    # Act
+    with open(weights, "wb") as f:
+        f.write(b"new weights")
+    stat = os.stat(weights)
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    # Assert
+    assert before != model_identity(model_dir)
+
+def test_model_identity_configuration(model_dir):
+    """Makes sure the backend and the quantization are part of the identity."""
+
+    # Act
+    identities = {model_identity(model_dir), model_identity(model_dir, "tf"), model_identity(model_dir, quantize=True)}
+
+    # Assert
+    assert 3 == len(identities)
+    assert model_identity(model_dir) == model_identity(model_dir)
+
+def test_persisted_across_runs(tmp_path, model_dir):
+    """Makes sure a prediction is found again after reopening the cache, for
+    the same text up to whitespace."""
+
+    # Arrange
+    path = str(tmp_path / "cache.db")
+    cache = PredictionCache(path, model_dir)
+    cache.put("I love it", POSITIVE)
+    cache.close()
+
+    # Act
+    cache = PredictionCache(path, model_dir)
+    cached = cache.get("  I love   it ")
+
+    # Assert
+    assert POSITIVE == cached
+    assert 1 == cache.stats()["disk_hits"]
+    cache.close()
+
+def test_invalidated_by_model_change(tmp_path, model_dir):
+    """Makes sure predictions of a replaced model aren't returned."""
+
+    # Arrange
+    path = str(tmp_path / "cache.db")
+    cache = PredictionCache(path, model_dir)
+    cache.put("I love it", POSITIVE)
+    cache.close()
+    with open(os.path.join(model_dir, "config.json"), "w") as f:
+        f.write('{"num_labels": 2}')
+
+    # Act
+    cache = PredictionCache(path, model_dir)
+    cached = cache.get("I love it")
+
+    # Assert
+    assert cached is None
+    cache.close()
+
+def test_memory_eviction(tmp_path, model_dir):
+    """Makes sure the in-memory LRU keeps the most recently used entries and
+    the evicted ones are still read from disk."""
+
+    # Arrange
+    cache = PredictionCache(str(tmp_path / "cache.db"), model_dir, memory_entries=2)
+    for text in ("a", "b", "c"):
+        cache.put(text, POSITIVE)
+
+    # Act
+    cached = cache.get_many(["b", "c", "a"])
+
+    # Assert
+    assert [0, 1, 2] == sorted(cached)
+    stats = cache.stats()
+    assert (2, 1, 2) == (stats["memory_hits"], stats["disk_hits"], stats["memory_entries"])
+    cache.close()
+
+def test_disk_eviction(tmp_path, model_dir):
+    """Makes sure evicting keeps the max_entries most recently used entries."""
+
+    # Arrange
+    cache = PredictionCache(str(tmp_path / "cache.db"), model_dir, memory_entries=0, max_entries=2)
+    for text in ("a", "b", "c"):
+        cache.put(text, POSITIVE)
+        # Distinct access times, so the least recently used is known
+        time.sleep(0.01)
+    cache.get("a")
+
+    # Act
+    cache.evict()
+
+    # Assert
+    assert 2 == cache.stats()["disk_entries"]
+    assert cache.get("b") is None
+    assert POSITIVE == cache.get("a")
+    cache.close()
+
+def test_expired_entries(tmp_path, model_dir):
+    """Makes sure entries older than max_age are neither returned nor kept."""
+
+    # Arrange
+    cache = PredictionCache(str(tmp_path / "cache.db"), model_dir, max_age=-1)
+    cache.put("I love it", POSITIVE)
+
+    # Act
+    cached = cache.get("I love it")
+    cache.evict()
+
+    # Assert
+    assert cached is None
+    assert 0 == cache.stats()["disk_entries"]
+    cache.close()
@@ -0,0 +1,217 @@
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+# Why an operation was rejected
+REJECTED_INVALID_AMOUNT = 1
+REJECTED_UNKNOWN_ACCOUNT = 2
+REJECTED_OVERDRAFT = 3
+
+def to_cents(money) -> np.ndarray:
+    """Converts amounts of money to integer cents, rounding to the nearest cent"""
+
+    return np.rint(np.asarray(money, dtype=np.float64) * 100).astype(np.int64)
+
+def running_balances(start: np.ndarray, accounts: np.ndarray, cents: np.ndarray) -> np.ndarray:
+    """Balance of the account after every operation of a batch grouped by account
+
+    Args:
+        start (np.ndarray): The balances before the batch, by account.
+        accounts (np.ndarray): The account of every operation, equal accounts
+            next to each other.
+        cents (np.ndarray): The amount of every operation.
+
+    Returns:
+        np.ndarray: The running balance after every operation.
+    """
+
+    if not len(accounts):
+        return cents.copy()
+    totals = np.cumsum(cents)
+    group_starts = np.flatnonzero(np.r_[True, accounts[1:] != accounts[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(accounts)])
+    before_group = np.repeat(totals[group_starts] - cents[group_starts], group_sizes)
+    return start[accounts] + totals - before_group
+
+class AccountView:
+    """A single account of an AccountBook, with the interface of BankAccount."""
+
+    def __init__(self, book: "AccountBook", index: int) -> None:
+        self._book = book
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self._book.names[self.index]
+
+    @property
+    def money(self) -> float:
+        return int(self._book.cents[self.index]) / 100
+
+    def __repr__(self) -> str:
+        return f"Owner: {self.name} - Money: {self.money}$"
+
+    def deposit_money(self, money: float) -> None:
+        """Deposits money into the account.
+
+        Args:
+            money (float): The money to deposit.
+        """
+
+        assert isinstance(money, float), f"{money} must be float."
+        assert money > 0.0, f"{money} must be a positive number."
+        self._book.cents[self.index] += int(to_cents(money))
+
+    def get_money(self, money: float) -> None:
+        """Gets money from the account.
+
+        Args:
+            money (float): The money to get.
+        """
+
+        assert isinstance(money, float), f"{money} must be float."
+        assert money > 0.0, f"{money} must be a positive number."
+        cents = int(to_cents(money))
+        assert self._book.cents[self.index] >= cents,(
+            f"There's no enough {money} in the account. "
+            f"Current money: {self.money}"
+        )
+        self._book.cents[self.index] -= cents
+
+    def has_money(self) -> bool:
+        """Checks if the account has money."""
+
+        return bool(self._book.cents[self.index] > 0)
+
+class AccountBook:
+    """Many accounts stored as columns, with balances in integer cents.
+
+    Batches of operations are applied with a few array passes instead of one
+    method call per operation, and cents don't drift like float sums do.
+    """
+
+    def __init__(self, names: Sequence[str], money: Iterable[float]) -> None:
+        """Constructor.
+
+        Args:
+            names (Sequence[str]): The owner of every account.
+            money (Iterable[float]): The initial money of every account.
+        """
+
+        self.names = np.asarray(names, dtype=object)
+        self.cents = to_cents(list(money))
+        assert self.names.shape == self.cents.shape,(
+            f"Got {len(self.names)} names but {len(self.cents)} balances."
+        )
+
+    @classmethod
+    def from_cents(cls, names: Sequence[str], cents: np.ndarray) -> "AccountBook":
+        """Builds a book from balances already in cents, without converting them"""
+
+        book = cls([], [])
+        book.names = np.asarray(names, dtype=object)
+        book.cents = np.array(cents, dtype=np.int64)
+        assert book.names.shape == book.cents.shape,(
+            f"Got {len(book.names)} names but {len(book.cents)} balances."
+        )
+        return book
+
+    @classmethod
+    def from_accounts(cls, accounts: Iterable) -> "AccountBook":
+        """Builds a book from BankAccount objects"""
+
+        accounts = list(accounts)
+        return cls([account.name for account in accounts], [account.money for account in accounts])
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    def __getitem__(self, index: int) -> AccountView:
+        assert -len(self) <= index < len(self), f"{index} is not an account of the book."
+        return AccountView(self, index % len(self))
+
+    def apply(self, accounts: np.ndarray, cents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Applies a batch of operations, see check()
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The indices of the rejected
+                operations and the REJECTED_* reason of each.
+        """
+
+        accounts = np.asarray(accounts, dtype=np.int64)
+        cents = np.asarray(cents, dtype=np.int64)
+        rejected, reasons = self.check(accounts, cents)
+        accepted = np.ones(len(cents), dtype=bool)
+        accepted[rejected] = False
+        np.add.at(self.cents, accounts[accepted], cents[accepted])
+        return rejected, reasons
+
+    def check(self, accounts: np.ndarray, cents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the operations of a batch apply() rejects, without changing the book.
+
+        A withdrawal is rejected when the account doesn't have the money at that
+        point of the batch, like BankAccount.get_money, and rejected operations
+        leave the balance untouched. The running balances of all accounts are
+        computed at once, and only the accounts that run short are replayed, in
+        a single pass from their first failing withdrawal, so the work stays
+        linear in the size of the batch however many withdrawals are rejected.
+
+        Args:
+            accounts (np.ndarray): The account index of every operation.
+            cents (np.ndarray): The amount of every operation in cents,
+                positive for deposits and negative for withdrawals.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The indices of the rejected
+                operations and the REJECTED_* reason of each.
+        """
+
+        accounts = np.asarray(accounts, dtype=np.int64)
+        cents = np.asarray(cents, dtype=np.int64)
+        assert accounts.shape == cents.shape, "Every operation needs an account and an amount."
+        reasons = np.zeros(len(cents), dtype=np.int8)
+        reasons[cents == 0] = REJECTED_INVALID_AMOUNT
+        reasons[(accounts < 0) | (accounts >= len(self))] = REJECTED_UNKNOWN_ACCOUNT
+
+        valid = np.flatnonzero(reasons == 0)
+        # A stable sort groups the operations by account and keeps their order
+        order = valid[np.argsort(accounts[valid], kind="stable")]
+        sorted_accounts = accounts[order]
+        sorted_cents = cents[order]
+        running = running_balances(self.cents, sorted_accounts, sorted_cents)
+        failing = np.flatnonzero((sorted_cents < 0) & (running < 0))
+
+        # Operations before the first failure of an account are all accepted,
+        # so each account that runs short is replayed from that failure to the
+        # end of its operations, once
+        short_accounts, first = np.unique(sorted_accounts[failing], return_index=True)
+        starts = failing[first]
+        lengths = np.searchsorted(sorted_accounts, short_accounts, side="right") - starts
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        replayed = np.repeat(starts, lengths) + offsets
+        start_balances = np.repeat(running[starts] - sorted_cents[starts], lengths)
+        balance = 0
+        for position, offset, start_balance, amount in zip(
+            replayed.tolist(), offsets.tolist(), start_balances.tolist(), sorted_cents[replayed].tolist()
+        ):
+            if not offset:
+                balance = start_balance
+            if balance + amount < 0:
+                reasons[order[position]] = REJECTED_OVERDRAFT
+            else:
+                balance += amount
+
+        rejected = np.flatnonzero(reasons)
+        return rejected, reasons[rejected]
+
+    def deposit(self, accounts: np.ndarray, money: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Deposits money, see apply(). Non-positive amounts are rejected"""
+
+        cents = to_cents(money)
+        return self.apply(accounts, np.where(cents > 0, cents, 0))
+
+    def withdraw(self, accounts: np.ndarray, money: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets money, see apply(). Non-positive amounts are rejected"""
+
+        cents = to_cents(money)
+        return self.apply(accounts, np.where(cents > 0, -cents, 0))
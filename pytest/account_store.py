@@ -0,0 +1,301 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+class LatencyModel:
+    """A simulated cost of every commit, so benchmarks can model a slow database."""
+
+    def __init__(self, per_commit: float = 0.0, per_row: float = 0.0) -> None:
+        """Constructor.
+
+        Args:
+            per_commit (float, optional): Seconds every commit takes, e.g. a
+                network round-trip or an fsync. Defaults to 0.0.
+            per_row (float, optional): Extra seconds per written row.
+                Defaults to 0.0.
+        """
+
+        assert per_commit >= 0.0, f"{per_commit} must be a non-negative number."
+        assert per_row >= 0.0, f"{per_row} must be a non-negative number."
+        self.per_commit = per_commit
+        self.per_row = per_row
+
+    def delay(self, rows: int) -> float:
+        """Returns the seconds a commit of the given rows takes"""
+
+        return self.per_commit + self.per_row * rows
+
+    def wait(self, rows: int) -> None:
+        """Blocks for the duration of a commit of the given rows"""
+
+        delay = self.delay(rows)
+        if delay > 0:
+            time.sleep(delay)
+
+class AccountStore(ABC):
+    """Where BankAccount balances are persisted.
+
+    write() commits the (account id, name, money) of many accounts at once and
+    counts the commits and rows, subclasses only implement the storage itself.
+    """
+
+    def __init__(self) -> None:
+        self.commits = 0
+        self.rows = 0
+        # One commit at a time, like a single database connection
+        self._lock = threading.Lock()
+
+    def write(self, rows: List[Tuple[str, str, float]]) -> None:
+        """Writes the (account id, name, money) of many accounts in one transaction"""
+
+        with self._lock:
+            self._write(rows)
+            self.commits += 1
+            self.rows += len(rows)
+
+    def submit(self, account) -> Future:
+        """Writes an account right away, so a store can be used like a PersistenceQueue
+
+        Returns:
+            Future: Already resolved, with the exception if the write failed.
+        """
+
+        future = Future()
+        try:
+            self.write([account.snapshot()])
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+        return future
+
+    @abstractmethod
+    def _write(self, rows: List[Tuple[str, str, float]]) -> None:
+        """Commits the rows, called with the store locked"""
+
+    @abstractmethod
+    def load(self, account_id: str) -> Optional[Tuple[str, float]]:
+        """Reads the name and money stored for an account, None if it isn't stored"""
+
+    def close(self) -> None:
+        """Releases the resources of the store"""
+
+class InMemoryAccountStore(AccountStore):
+    """Keeps the accounts in a dict, for tests that don't need a real database."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._accounts: Dict[str, Tuple[str, float, float]] = {}
+        self._closed = False
+
+    def _write(self, rows: List[Tuple[str, str, float]]) -> None:
+        assert not self._closed, "Error: The store is closed."
+        now = time.time()
+        self._accounts.update((account_id, (name, money, now)) for account_id, name, money in rows)
+
+    def load(self, account_id: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            assert not self._closed, "Error: The store is closed."
+            account = self._accounts.get(account_id)
+            return account[:2] if account is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+
+class SQLiteAccountStore(AccountStore):
+    """Persists account balances in a SQLite database."""
+
+    def __init__(self, path: str = ":memory:") -> None:
+        """Constructor.
+
+        Args:
+            path (str, optional): The SQLite file. Defaults to ":memory:".
+        """
+
+        super().__init__()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS balances ("
+            "account_id TEXT PRIMARY KEY, name TEXT NOT NULL, money REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _write(self, rows: List[Tuple[str, str, float]]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO balances VALUES (?, ?, ?, ?)",
+            [(account_id, name, money, now) for account_id, name, money in rows],
+        )
+        self._conn.commit()
+
+    def load(self, account_id: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            return self._conn.execute("SELECT name, money FROM balances WHERE account_id = ?", (account_id,)).fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class LatencyAccountStore(AccountStore):
+    """Wraps another store and makes every commit take longer, like a remote database."""
+
+    def __init__(self, store: AccountStore, latency: LatencyModel) -> None:
+        """Constructor.
+
+        Args:
+            store (AccountStore): The store the rows are actually written to.
+            latency (LatencyModel): Simulated cost of every commit.
+        """
+
+        super().__init__()
+        self.store = store
+        self.latency = latency
+
+    def _write(self, rows: List[Tuple[str, str, float]]) -> None:
+        self.store.write(rows)
+        self.latency.wait(len(rows))
+
+    def load(self, account_id: str) -> Optional[Tuple[str, float]]:
+        return self.store.load(account_id)
+
+    def close(self) -> None:
+        self.store.close()
+
+class PersistenceQueue:
+    """Writes dirty accounts from a background thread with group commits.
+
+    Accounts submitted while a commit is running wait for the next one, and an
+    account submitted several times is written once with its latest balance.
+    Every submission returns a future resolved once that balance is committed.
+    """
+
+    def __init__(self, store: AccountStore, max_batch: int = 1000, max_delay_ms: float = 5.0) -> None:
+        """Constructor.
+
+        Args:
+            store (AccountStore): Where the accounts are written.
+            max_batch (int, optional): Maximum accounts per commit.
+                Defaults to 1000.
+            max_delay_ms (float, optional): Time the first dirty account waits
+                for others to join its commit. Defaults to 5.0.
+        """
+
+        assert max_batch > 0, f"{max_batch} must be a positive number."
+        assert max_delay_ms >= 0, f"{max_delay_ms} must be a non-negative number."
+        self.store = store
+        self._max_batch = max_batch
+        self._max_delay = max_delay_ms / 1000
+        # Dirty accounts by id, with the futures waiting for their commit
+        self._pending: Dict[str, Tuple[object, List[Future]]] = {}
+        # Futures of the commit running now
+        self._in_flight: List[Future] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self.submitted = 0
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def submit(self, account) -> Future:
+        """Marks an account as dirty
+
+        Args:
+            account (BankAccount): The account to persist.
+
+        Returns:
+            Future: Resolved once a balance at least as new as the current one
+                is committed.
+        """
+
+        future = Future()
+        with self._condition:
+            assert not self._closed, "Error: The persistence queue is closed."
+            _, futures = self._pending.setdefault(account.account_id, (account, []))
+            futures.append(future)
+            self.submitted += 1
+            self._condition.notify()
+        return future
+
+    def flush(self) -> None:
+        """Blocks until every account submitted so far is committed"""
+
+        with self._condition:
+            futures = self._in_flight + [future for _, futures in self._pending.values() for future in futures]
+        for future in futures:
+            future.exception()
+
+    def close(self) -> None:
+        """Commits the dirty accounts and stops the background thread"""
+
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _take_batch(self) -> Optional[List[Tuple[object, List[Future]]]]:
+        """Waits for dirty accounts and takes up to max_batch of them, None once closed and drained"""
+
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                return None
+            deadline = time.monotonic() + self._max_delay
+            while not self._closed and len(self._pending) < self._max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                self._condition.wait(timeout)
+            account_ids = list(self._pending)[:self._max_batch]
+            batch = [self._pending.pop(account_id) for account_id in account_ids]
+            self._in_flight = [future for _, futures in batch for future in futures]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                # Balances are read at commit time, so they're the latest ones
+                self.store.write([account.snapshot() for account, _ in batch])
+            except Exception as e:
+                for _, futures in batch:
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+            for _, futures in batch:
+                for future in futures:
+                    future.set_result(None)
+
+# Database of default_persistence() when $BANK_DATABASE isn't set, in the home
+# directory so it doesn't depend on where the program is started from
+DEFAULT_DATABASE = os.path.join(os.path.expanduser("~"), ".bank_accounts.db")
+
+_default_queue: Optional[PersistenceQueue] = None
+_default_lock = threading.Lock()
+
+def default_persistence() -> PersistenceQueue:
+    """The queue used when no other is given
+
+    It writes to the SQLite file named by $BANK_DATABASE, DEFAULT_DATABASE
+    if it isn't set.
+    """
+
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            store = SQLiteAccountStore(os.environ.get("BANK_DATABASE", DEFAULT_DATABASE))
+            _default_queue = PersistenceQueue(store)
+            # Dirty accounts are committed before the interpreter exits
+            atexit.register(_default_queue.close)
+        return _default_queue
@@ -1,23 +1,43 @@
+import itertools
 import random
-import time
+import threading
+import uuid
+from concurrent.futures import Future
+from contextlib import ExitStack, contextmanager
+from typing import Tuple, Union
+
+from account_store import AccountStore, PersistenceQueue, default_persistence
+
+# Gives every account a fixed rank in this process, so locks are always taken
+# in the same order. Not persisted, see account_id
+_account_numbers = itertools.count()
 
 class BankAccount:
     """A class to simulate a bank account."""
 
-    def __init__(self, name: str, money: float = 0.0) -> None:
+    def __init__(self, name: str, money: float = 0.0, account_id: str = None) -> None:
         """Constructor.
 
         Args:
             name (str): The name of the owner.
             money (float, optional): Initial money. Defaults to 0.0.
+            account_id (str, optional): Identifier the account is persisted
+                under, the same in every run. Defaults to a new random UUID.
         """
 
         assert isinstance(name, str),(
             f"Invalid name: {name}. Must be a str."
         )
         assert isinstance(money, float), f"{money} must be float."
+        assert account_id is None or isinstance(account_id, str),(
+            f"Invalid account id: {account_id}. Must be a str."
+        )
         self.name = name
+        self.account_id = account_id or uuid.uuid4().hex
         self.money = money
+        self.number = next(_account_numbers)
+        # Reentrant, so an operation can run while lock_accounts() holds it
+        self._lock = threading.RLock()
         
     def __repr__(self) -> str:
         """Reproducible dunder method.
@@ -37,7 +57,8 @@ class BankAccount:
 
         assert isinstance(money, float), f"{money} must be float."
         assert money > 0.0, f"{money} must be a positive number."
-        self.money += money
+        with self._lock:
+            self.money += money
 
     def get_money(self, money: float):
         """Gets money from the account.
@@ -48,11 +69,14 @@ class BankAccount:
 
         assert isinstance(money, float), f"{money} must be float."
         assert money > 0.0, f"{money} must be a positive number."
-        assert self.money >= money,(
-            f"There's no enough {money} in the account. " 
-            f"Current money: {self.money}"
-        )
-        self.money -= money
+        # The check and the withdrawal must happen atomically, otherwise two
+        # concurrent withdrawals can both pass the check
+        with self._lock:
+            assert self.money >= money,(
+                f"There's no enough {money} in the account. " 
+                f"Current money: {self.money}"
+            )
+            self.money -= money
         
     def has_money(self) -> bool:
         """Checks if the user has money.
@@ -63,15 +87,72 @@ class BankAccount:
         
         return self.money > 0.0
            
-    def update_database(self) -> None:
+    def snapshot(self) -> Tuple[str, str, float]:
+        """Reads the account consistently.
+
+        Returns:
+            Tuple[str, str, float]: The id, owner and money of the account.
+        """
+
+        with self._lock:
+            return self.account_id, self.name, self.money
+
+    def update_database(self, persistence: Union[PersistenceQueue, AccountStore] = None) -> Future:
         """Updates the database with the current information.
         
-        This function is currently a simulation.
+        Through a PersistenceQueue the account is written in the background
+        together with the other dirty accounts, so this call doesn't block.
+        Through an AccountStore it is written right away.
+
+        Args:
+            persistence (Union[PersistenceQueue, AccountStore], optional): Where
+                the account is written. Defaults to the queue of
+                default_persistence().
 
+        Returns:
+            Future: Resolved once the current money is committed.
         """
         
-        # Simulate that we update a database
-        time.sleep(10)
+        return (persistence or default_persistence()).submit(self)
+
+@contextmanager
+def lock_accounts(*accounts: BankAccount):
+    """Holds the locks of several accounts at once.
+
+    Locks are taken in the order of the account numbers, so two threads locking
+    overlapping sets of accounts can never deadlock.
+
+    Args:
+        *accounts (BankAccount): The accounts to lock.
+    """
+
+    with ExitStack() as stack:
+        for account in sorted(set(accounts), key=lambda account: account.number):
+            stack.enter_context(account._lock)
+        yield
+
+def transfer(source: BankAccount, destination: BankAccount, money: float) -> None:
+    """Moves money from one account to another atomically.
+
+    Either both balances change or none does, and no other thread can see the
+    money withdrawn but not yet deposited.
+
+    Args:
+        source (BankAccount): The account the money is taken from.
+        destination (BankAccount): The account the money goes to.
+        money (float): The money to transfer.
+    """
+
+    assert isinstance(money, float), f"{money} must be float."
+    assert money > 0.0, f"{money} must be a positive number."
+    assert source is not destination, "Can't transfer money to the same account."
+    with lock_accounts(source, destination):
+        assert source.money >= money,(
+            f"There's no enough {money} in the account. "
+            f"Current money: {source.money}"
+        )
+        source.money -= money
+        destination.money += money
         
 # if __name__ == "__main__":
     
@@ -0,0 +1,56 @@
+import argparse
+import time
+
+import numpy as np
+
+from account_book import AccountBook, to_cents
+from bank_account import BankAccount
+
+def apply_to_objects(accounts: list, operations: np.ndarray, money: np.ndarray) -> int:
+    """Applies the operations one method call at a time, returns the rejected count"""
+
+    rejected = 0
+    for account, amount in zip(operations.tolist(), money.tolist()):
+        try:
+            if amount > 0:
+                accounts[account].deposit_money(amount)
+            else:
+                accounts[account].get_money(-amount)
+        except AssertionError:
+            rejected += 1
+    return rejected
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares AccountBook with one BankAccount object per account")
+    parser.add_argument("--accounts", default=1000000, type=int, help="Number of accounts")
+    parser.add_argument("--operations", default=5000000, type=int, help="Deposits and withdrawals per batch")
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the synthetic operations")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    initial = rng.integers(0, 100000, args.accounts) / 100
+    operations = rng.integers(0, args.accounts, args.operations)
+    # Whole cents between -500 and 500, never zero
+    money = rng.choice([-1, 1], args.operations) * rng.integers(1, 50000, args.operations) / 100
+
+    start = time.perf_counter()
+    accounts = [BankAccount(f"Subject {i}", balance) for i, balance in enumerate(initial.tolist())]
+    objects_build = time.perf_counter() - start
+    start = time.perf_counter()
+    objects_rejected = apply_to_objects(accounts, operations, money)
+    objects_apply = time.perf_counter() - start
+
+    start = time.perf_counter()
+    book = AccountBook([f"Subject {i}" for i in range(args.accounts)], initial)
+    book_build = time.perf_counter() - start
+    start = time.perf_counter()
+    rejected, _ = book.apply(operations, to_cents(money))
+    book_apply = time.perf_counter() - start
+
+    print(f"{'':>12} {'build':>8} {'apply':>8} {'ops/s':>12} {'rejected':>9}")
+    print(f"{'objects':>12} {objects_build:>7.2f}s {objects_apply:>7.2f}s {args.operations / objects_apply:>12,.0f} {objects_rejected:>9}")
+    print(f"{'AccountBook':>12} {book_build:>7.2f}s {book_apply:>7.2f}s {args.operations / book_apply:>12,.0f} {len(rejected):>9}")
+
+    # Float balances drift, so they are compared to the cent
+    mismatches = np.count_nonzero(to_cents([account.money for account in accounts]) != book.cents)
+    print(f"Accounts whose final money differs: {mismatches}")
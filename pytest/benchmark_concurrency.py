@@ -0,0 +1,65 @@
+import argparse
+import random
+import threading
+import time
+
+from bank_account import BankAccount, lock_accounts, transfer
+
+def run(num_threads: int, args: argparse.Namespace, global_lock: bool) -> dict:
+    """Runs random transfers from several threads and checks the books balance
+
+    Every transfer also holds its accounts for --hold-ms, standing for the
+    database write of both balances. With global_lock a single lock serializes
+    all transfers instead of the per-account locks.
+    """
+
+    accounts = [BankAccount(f"Subject {i}", args.initial_money) for i in range(args.accounts)]
+    total = sum(account.money for account in accounts)
+    bank_lock = threading.Lock()
+    hold = args.hold_ms / 1000
+    completed = []
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        done = 0
+        for _ in range(args.transfers // num_threads):
+            source, destination = rng.sample(accounts, 2)
+            money = float(rng.randint(1, 100))
+            locks = bank_lock if global_lock else lock_accounts(source, destination)
+            with locks:
+                try:
+                    transfer(source, destination, money)
+                except AssertionError:
+                    pass
+                if hold:
+                    time.sleep(hold)
+            done += 1
+        completed.append(done)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    assert total == sum(account.money for account in accounts), "Error: Money was created or lost."
+    assert all(account.money >= 0.0 for account in accounts), "Error: An account was overdrawn."
+    return {"transfers": sum(completed), "throughput": sum(completed) / elapsed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress test and throughput of concurrent transfers")
+    parser.add_argument("--threads", nargs="+", default=[1, 2, 4, 8, 16], type=int, help="Thread counts to measure")
+    parser.add_argument("--accounts", default=1000, type=int, help="Number of accounts")
+    parser.add_argument("--transfers", default=4000, type=int, help="Transfers per measurement")
+    parser.add_argument("--initial-money", default=1000.0, type=float, help="Initial money of every account")
+    parser.add_argument("--hold-ms", default=1.0, type=float, help="Time a transfer keeps its accounts locked")
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'per-account locks':>18} {'global lock':>12}")
+    for num_threads in args.threads:
+        per_account = run(num_threads, args, global_lock=False)
+        single = run(num_threads, args, global_lock=True)
+        print(f"{num_threads:>8} {per_account['throughput']:>14.0f}/s {single['throughput']:>10.0f}/s")
+    print("Books balanced and no account overdrawn in every run")
@@ -0,0 +1,60 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from account_book import AccountBook
+from journal import Journal
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures journal writes, recovery and compaction")
+    parser.add_argument("--accounts", default=1000000, type=int, help="Number of accounts")
+    parser.add_argument("--records", default=10000000, type=int, help="Records journaled after the first snapshot")
+    parser.add_argument("--batch-size", default=100000, type=int, help="Records per append")
+    parser.add_argument("--snapshot-every", default=0, type=int, help="Records between snapshots, 0 for one at the start")
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the synthetic records")
+    parser.add_argument("--directory", required=False, type=str, help="Where the journal is written")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory(dir=args.directory) as tmp_dir:
+        book = AccountBook([f"Subject {i}" for i in range(args.accounts)], np.zeros(args.accounts))
+        # Fsyncs are left out of the write timing, recovery is what's measured
+        journal = Journal(tmp_dir, durable=False)
+        journal.snapshot(book)
+
+        start = time.perf_counter()
+        for first in range(0, args.records, args.batch_size):
+            size = min(args.batch_size, args.records - first)
+            accounts = rng.integers(0, args.accounts, size)
+            # Only deposits, so the book accepts every record
+            cents = rng.integers(1, 100000, size)
+            book.apply(accounts, cents)
+            journal.append(accounts, cents)
+            if args.snapshot_every and (first + size) % args.snapshot_every < args.batch_size:
+                journal.snapshot(book)
+        journal.close()
+        write_time = time.perf_counter() - start
+        size_mb = sum(os.path.getsize(path) for _, path in journal.segments()) / 1e6
+        print(f"Wrote {args.records:,} records ({size_mb:.0f}MB in {len(journal.segments())} segments) in {write_time:.2f}s")
+
+        replayed = journal.next_record - journal.latest_snapshot()[0]
+        start = time.perf_counter()
+        recovered = Journal(tmp_dir, durable=False).recover()
+        recovery_time = time.perf_counter() - start
+        assert np.array_equal(book.cents, recovered.cents), "Error: The recovered book differs."
+        print(
+            f"Recovered {args.accounts:,} accounts replaying {replayed:,} records in {recovery_time:.2f}s "
+            f"({replayed / recovery_time / 1e6:.1f}M records/s)"
+        )
+
+        journal.snapshot(book)
+        start = time.perf_counter()
+        deleted = journal.compact()
+        print(f"Compaction after a new snapshot deleted {deleted} files in {time.perf_counter() - start:.3f}s")
+        start = time.perf_counter()
+        recovered = Journal(tmp_dir, durable=False).recover()
+        assert np.array_equal(book.cents, recovered.cents), "Error: The recovered book differs."
+        print(f"Recovery from the new snapshot took {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,53 @@
+import argparse
+import os
+import tempfile
+import time
+
+from account_store import AccountStore, LatencyAccountStore, LatencyModel, PersistenceQueue, SQLiteAccountStore
+from bank_account import BankAccount
+
+def persist_one_by_one(accounts: list, store: AccountStore) -> None:
+    """The former behaviour: every account is written and waited for on its own"""
+
+    for account in accounts:
+        store.write([account.snapshot()])
+
+def persist_grouped(accounts: list, store: AccountStore, updates: int) -> None:
+    """Queues every update of every account and waits until all are durable"""
+
+    queue = PersistenceQueue(store)
+    futures = []
+    for _ in range(updates):
+        for account in accounts:
+            account.deposit_money(1.0)
+            futures.append(account.update_database(queue))
+    for future in futures:
+        future.result()
+    queue.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares one commit per account with group-committed persistence")
+    parser.add_argument("--accounts", default=1000, type=int, help="Number of accounts to persist")
+    parser.add_argument("--updates", default=5, type=int, help="Updates of every account in the grouped run")
+    parser.add_argument("--commit-ms", default=10.0, type=float, help="Simulated time of every commit")
+    args = parser.parse_args()
+
+    accounts = [BankAccount(f"Subject {i}", 1000.0) for i in range(args.accounts)]
+    latency = LatencyModel(per_commit=args.commit_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = LatencyAccountStore(SQLiteAccountStore(os.path.join(tmp_dir, "sequential.db")), latency)
+        start = time.perf_counter()
+        persist_one_by_one(accounts, store)
+        sequential = time.perf_counter() - start
+        print(f"One commit per account: {sequential:.2f}s for {args.accounts} accounts - {store.commits} commits")
+        store.close()
+
+        store = LatencyAccountStore(SQLiteAccountStore(os.path.join(tmp_dir, "grouped.db")), latency)
+        start = time.perf_counter()
+        persist_grouped(accounts, store, args.updates)
+        grouped = time.perf_counter() - start
+        print(
+            f"Group commit: {grouped:.2f}s for {args.accounts * args.updates} updates - "
+            f"{store.rows} rows in {store.commits} commits"
+        )
+        store.close()
@@ -1,9 +1,132 @@
+import json
+import os
+
 import pytest
 
+from account_book import AccountBook
+from account_store import (
+    InMemoryAccountStore,
+    LatencyAccountStore,
+    LatencyModel,
+    PersistenceQueue,
+    SQLiteAccountStore,
+)
 from bank_account import BankAccount
 
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+def pytest_addoption(parser):
+    group = parser.getgroup("baseline", "Benchmark regressions against a stored baseline")
+    group.addoption("--baseline-file", default=BASELINE_FILE, help="JSON file with the median time of every baseline benchmark")
+    group.addoption("--save-baseline", action="store_true", help="Stores the medians of this run as the baseline")
+    # Off by default, timings only compare on the machine the baseline was saved on
+    group.addoption(
+        "--regression-threshold", default=None, type=float,
+        help="Fails baseline benchmarks whose median is this percentage slower than the baseline",
+    )
+
+BASELINE_KEY = pytest.StashKey[dict]()
+
+def pytest_configure(config):
+    path = config.getoption("--baseline-file")
+    baseline = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    config.stash[BASELINE_KEY] = baseline
+
+def pytest_sessionfinish(session):
+    if session.config.getoption("--save-baseline"):
+        with open(session.config.getoption("--baseline-file"), "w") as f:
+            json.dump(dict(sorted(session.config.stash[BASELINE_KEY].items())), f, indent=2)
+            f.write("\n")
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Compares the median of benchmarks marked with baseline to the stored one.
+
+    Only marked benchmarks are saved and checked, the others are free to be
+    slow or noisy. The check runs in the call phase, so a regression is
+    reported as a failed test.
+    """
+
+    result = yield
+    benchmark = item.funcargs.get("benchmark")
+    if item.get_closest_marker("baseline") is None or benchmark is None or benchmark.stats is None:
+        # Disabled benchmarks run once and have no stats
+        return result
+    baseline = item.config.stash[BASELINE_KEY]
+    name = item.nodeid
+    median = benchmark.stats.stats.median
+    if item.config.getoption("--save-baseline"):
+        baseline[name] = median
+        return result
+    threshold = item.config.getoption("--regression-threshold")
+    if threshold is not None and name in baseline and median > baseline[name] * (1 + threshold / 100):
+        pytest.fail(
+            f"Regression: median {median * 1e6:.3f}us is over {threshold}% slower "
+            f"than the baseline {baseline[name] * 1e6:.3f}us"
+        )
+    return result
+
 @pytest.fixture
 def example_bank_account():
     """An instance of BankAccount object."""
     
-    return BankAccount("Test User", 1000.0)
\ No newline at end of file
+    return BankAccount("Test User", 1000.0)
+
+@pytest.fixture
+def bank_accounts():
+    """Several BankAccount instances with the same initial money."""
+
+    return [BankAccount(f"Test User {i}", 1000.0) for i in range(10)]
+
+@pytest.fixture
+def example_account_book():
+    """An AccountBook of three accounts."""
+
+    return AccountBook(["User A", "User B", "User C"], [1000.0, 0.0, 50.0])
+
+@pytest.fixture
+def memory_store():
+    """An InMemoryAccountStore, the fastest backend."""
+
+    store = InMemoryAccountStore()
+    yield store
+    store.close()
+
+@pytest.fixture
+def account_store(tmp_path):
+    """A SQLiteAccountStore in a temporary file."""
+
+    store = SQLiteAccountStore(str(tmp_path / "accounts.db"))
+    yield store
+    store.close()
+
+@pytest.fixture
+def slow_store(memory_store):
+    """An in-memory store whose commits take 10ms, like a remote database."""
+
+    return LatencyAccountStore(memory_store, LatencyModel(per_commit=0.01))
+
+@pytest.fixture(params=["memory_store", "account_store", "slow_store"])
+def any_store(request):
+    """Every storage backend in turn."""
+
+    return request.getfixturevalue(request.param)
+
+@pytest.fixture
+def persistence(account_store):
+    """A PersistenceQueue writing to a temporary store."""
+
+    queue = PersistenceQueue(account_store)
+    yield queue
+    queue.close()
+
+@pytest.fixture
+def slow_persistence(slow_store):
+    """A PersistenceQueue whose commits take 10ms, like a remote database."""
+
+    queue = PersistenceQueue(slow_store)
+    yield queue
+    queue.close()
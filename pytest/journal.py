@@ -0,0 +1,255 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from account_book import AccountBook
+
+# A deposit (positive cents) or withdrawal (negative cents) of an account
+RECORD_DTYPE = np.dtype([("account", "<u8"), ("cents", "<i8")])
+
+SEGMENT_PREFIX = "journal-"
+SNAPSHOT_PREFIX = "snapshot-"
+
+def _fsync_directory(directory: str) -> None:
+    """Makes file creations and renames in a directory durable"""
+
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class Journal:
+    """A binary append-only journal of the operations applied to an AccountBook.
+
+    Records are fixed-size and numbered from 0. They're split into segment files
+    named after the number of their first record. A snapshot stores the whole
+    book as of a record number. Recovery loads the latest snapshot and replays
+    the records after it straight from memory-mapped segments. Compaction
+    deletes the segments and snapshots a newer snapshot made useless.
+
+    Only accepted operations are journaled, so replaying them needs no checks.
+    Opening accounts changes the shape of the book, which is journaled by taking
+    a snapshot.
+    """
+
+    def __init__(self, directory: str, segment_records: int = 1 << 20, durable: bool = True) -> None:
+        """Constructor.
+
+        Args:
+            directory (str): Where segments and snapshots are stored.
+            segment_records (int, optional): Records per segment file.
+                Defaults to 1048576 (16MB).
+            durable (bool, optional): Whether every append is fsynced before
+                returning. Defaults to True.
+        """
+
+        assert segment_records > 0, f"{segment_records} must be a positive number."
+        self.directory = directory
+        self._segment_records = segment_records
+        self._durable = durable
+        os.makedirs(directory, exist_ok=True)
+
+        self._file = None
+        self._segment_start = 0
+        self.next_record = 0
+        segments = self.segments()
+        if segments:
+            self._segment_start, path = segments[-1]
+            size = os.path.getsize(path)
+            # A crash during an append can leave a partial record at the end
+            with open(path, "r+b") as f:
+                f.truncate(size - size % RECORD_DTYPE.itemsize)
+            self.next_record = self._segment_start + size // RECORD_DTYPE.itemsize
+            self._file = open(path, "ab")
+        else:
+            snapshot = self.latest_snapshot()
+            self.next_record = snapshot[0] if snapshot else 0
+
+    def _list(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        """Lists the files of a kind as (record number, path), oldest first"""
+
+        files = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith(prefix) and filename.endswith(suffix):
+                files.append((int(filename[len(prefix):-len(suffix)]), os.path.join(self.directory, filename)))
+        return sorted(files)
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """The segments as (first record number, path), oldest first"""
+
+        return self._list(SEGMENT_PREFIX, ".log")
+
+    def snapshots(self) -> List[Tuple[int, str]]:
+        """The snapshots as (record number, path), oldest first"""
+
+        return self._list(SNAPSHOT_PREFIX, ".npz")
+
+    def latest_snapshot(self) -> Optional[Tuple[int, str]]:
+        """The most recent snapshot, None if there's none"""
+
+        snapshots = self.snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def _open_segment(self) -> None:
+        """Starts a new segment at the next record"""
+
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+        self._segment_start = self.next_record
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{self._segment_start:016d}.log")
+        self._file = open(path, "ab")
+        if self._durable:
+            _fsync_directory(self.directory)
+
+    def append(self, accounts: np.ndarray, cents: np.ndarray) -> None:
+        """Appends applied operations to the journal
+
+        Either every operation is appended or, if writing fails, none is.
+
+        Args:
+            accounts (np.ndarray): The account index of every operation.
+            cents (np.ndarray): The amount of every operation in cents.
+        """
+
+        records = np.empty(len(cents), dtype=RECORD_DTYPE)
+        records["account"] = accounts
+        records["cents"] = cents
+        start = self.next_record
+        try:
+            written = 0
+            while written < len(records):
+                if self._file is None or self.next_record - self._segment_start >= self._segment_records:
+                    self._open_segment()
+                room = self._segment_records - (self.next_record - self._segment_start)
+                chunk = records[written:written + room]
+                self._file.write(chunk.tobytes())
+                written += len(chunk)
+                self.next_record += len(chunk)
+            self._sync()
+        except BaseException:
+            self._truncate(start)
+            raise
+
+    def _truncate(self, record: int) -> None:
+        """Drops the records from a record number on, undoing a failed append"""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        segments = self.segments()
+        for first, path in segments:
+            if first >= record:
+                os.remove(path)
+        remaining = [(first, path) for first, path in segments if first < record]
+        self.next_record = record
+        self._segment_start = record
+        if remaining:
+            self._segment_start, path = remaining[-1]
+            with open(path, "r+b") as f:
+                f.truncate((record - self._segment_start) * RECORD_DTYPE.itemsize)
+            self._file = open(path, "ab")
+
+    def _sync(self) -> None:
+        self._file.flush()
+        if self._durable:
+            os.fsync(self._file.fileno())
+
+    def apply(self, book: AccountBook, accounts: np.ndarray, cents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Journals the accepted operations of a batch, then applies them to a book
+
+        The book only changes once the operations are in the journal, so a
+        failed write leaves both as they were.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The rejected operations, see
+                AccountBook.apply().
+        """
+
+        accounts = np.asarray(accounts, dtype=np.int64)
+        cents = np.asarray(cents, dtype=np.int64)
+        rejected, reasons = book.check(accounts, cents)
+        accepted = np.ones(len(cents), dtype=bool)
+        accepted[rejected] = False
+        self.append(accounts[accepted], cents[accepted])
+        np.add.at(book.cents, accounts[accepted], cents[accepted])
+        return rejected, reasons
+
+    def snapshot(self, book: AccountBook) -> str:
+        """Stores the whole book as of the next record
+
+        Returns:
+            str: The path of the snapshot.
+        """
+
+        if self._file is not None:
+            self._sync()
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{self.next_record:016d}.npz")
+        # Written aside and renamed, so a crash never leaves a partial snapshot
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, names=np.asarray(book.names, dtype=str), cents=book.cents)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        _fsync_directory(self.directory)
+        return path
+
+    def recover(self) -> AccountBook:
+        """Rebuilds the book from the latest snapshot and the records after it"""
+
+        snapshot = self.latest_snapshot()
+        assert snapshot is not None, f"Error: There's no snapshot in {self.directory}."
+        start, path = snapshot
+        with np.load(path) as data:
+            book = AccountBook.from_cents(data["names"], data["cents"])
+
+        if self._file is not None:
+            self._file.flush()
+        for first, segment in self.segments():
+            size = os.path.getsize(segment) // RECORD_DTYPE.itemsize
+            if first + size <= start or not size:
+                continue
+            records = np.memmap(segment, dtype=RECORD_DTYPE, mode="r", shape=(size,))
+            records = records[max(0, start - first):]
+            np.add.at(book.cents, records["account"].astype(np.intp), records["cents"])
+            del records
+        return book
+
+    def compact(self, keep_snapshots: int = 1) -> int:
+        """Deletes the segments and snapshots older than the kept snapshots
+
+        Args:
+            keep_snapshots (int, optional): Most recent snapshots kept.
+                Defaults to 1.
+
+        Returns:
+            int: The number of deleted files.
+        """
+
+        assert keep_snapshots > 0, f"{keep_snapshots} must be a positive number."
+        snapshots = self.snapshots()
+        if not snapshots:
+            return 0
+        oldest_kept = snapshots[-keep_snapshots:][0][0]
+        deleted = [path for _, path in snapshots[:-keep_snapshots]]
+        segments = self.segments()
+        for (first, path), (next_first, _) in zip(segments, segments[1:]):
+            # A segment is only needed if it has records at or after the oldest kept snapshot
+            if next_first <= oldest_kept:
+                deleted.append(path)
+        for path in deleted:
+            os.remove(path)
+        if deleted:
+            _fsync_directory(self.directory)
+        return len(deleted)
+
+    def close(self) -> None:
+        """Syncs and closes the current segment"""
+
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from account_book import (REJECTED_INVALID_AMOUNT, REJECTED_OVERDRAFT, REJECTED_UNKNOWN_ACCOUNT,
+                          AccountBook)
+from bank_account import BankAccount
+
+def test_from_accounts():
+    """Makes sure a book keeps the names and money of BankAccount objects."""
+
+    # Arrange
+    accounts = [BankAccount("User A", 1000.0), BankAccount("User B", 12.34)]
+
+    # Act
+    book = AccountBook.from_accounts(accounts)
+
+    # Assert
+    assert ["User A", "User B"] == list(book.names)
+    assert [100000, 1234] == list(book.cents)
+
+def test_apply(example_account_book):
+    """Makes sure deposits and withdrawals are applied to their accounts."""
+
+    # Arrange
+    accounts = np.array([0, 1, 2, 0])
+    cents = np.array([-10000, 500, 2500, 199])
+
+    # Act
+    rejected, _ = example_account_book.apply(accounts, cents)
+
+    # Assert
+    assert 0 == len(rejected)
+    assert [90199, 500, 7500] == list(example_account_book.cents)
+
+def test_apply_in_order(example_account_book):
+    """Makes sure a withdrawal is only allowed by the deposits before it."""
+
+    # Arrange
+    accounts = np.array([1, 1, 1, 1])
+    cents = np.array([-100, 300, -200, -200])
+
+    # Act
+    rejected, reasons = example_account_book.apply(accounts, cents)
+
+    # Assert
+    assert [0, 3] == list(rejected)
+    assert [REJECTED_OVERDRAFT, REJECTED_OVERDRAFT] == list(reasons)
+    assert 100 == example_account_book.cents[1]
+
+def test_apply_invalid(example_account_book):
+    """Makes sure invalid operations are rejected and change nothing."""
+
+    # Arrange
+    accounts = np.array([0, 3, -1])
+    cents = np.array([0, 100, 100])
+
+    # Act
+    rejected, reasons = example_account_book.apply(accounts, cents)
+
+    # Assert
+    assert [0, 1, 2] == list(rejected)
+    assert [REJECTED_INVALID_AMOUNT, REJECTED_UNKNOWN_ACCOUNT, REJECTED_UNKNOWN_ACCOUNT] == list(reasons)
+    assert [100000, 0, 5000] == list(example_account_book.cents)
+
+def test_no_float_drift(example_account_book):
+    """Makes sure many small deposits add up exactly."""
+
+    # Act
+    example_account_book.deposit(np.ones(1000, dtype=np.int64), np.full(1000, 0.1))
+
+    # Assert
+    assert 100.0 == example_account_book[1].money
+
+def test_view(example_account_book):
+    """Makes sure a single account behaves like a BankAccount."""
+
+    # Arrange
+    account = example_account_book[0]
+
+    # Act
+    account.deposit_money(562.0)
+    account.get_money(62.0)
+
+    # Assert
+    assert repr(account) == "Owner: User A - Money: 1500.0$"
+    assert account.has_money()
+    assert not example_account_book[1].has_money()
+    with pytest.raises(AssertionError):
+        example_account_book[2].get_money(100.0)
+
+def test_apply_matches_sequential():
+    """Makes sure a random batch ends like applying its operations one by one."""
+
+    # Arrange
+    rng = np.random.default_rng(0)
+    book = AccountBook([f"User {i}" for i in range(20)], rng.integers(0, 100, 20).astype(float))
+    expected = book.cents.copy()
+    accounts = rng.integers(0, 20, 5000)
+    cents = rng.integers(-3000, 3000, 5000)
+    expected_rejected = []
+    for i, (account, amount) in enumerate(zip(accounts, cents)):
+        if amount == 0 or (amount < 0 and expected[account] < -amount):
+            expected_rejected.append(i)
+        else:
+            expected[account] += amount
+
+    # Act
+    rejected, _ = book.apply(accounts, cents)
+
+    # Assert
+    assert expected_rejected == list(rejected)
+    assert list(expected) == list(book.cents)
+
+def test_apply_many_overdrafts():
+    """Makes sure a batch where one account is rejected over and over is still
+    applied in one go, like applying its operations one by one."""
+
+    # Arrange
+    book = AccountBook(["User A", "User B"], [0.0, 10.0])
+    # Mostly withdrawals the account can't afford, with a deposit now and then
+    cents = np.where(np.arange(100000) % 1000 == 0, 500, -1)
+    accounts = np.zeros(len(cents), dtype=np.int64)
+    balance, expected_rejected = 0, []
+    for i, amount in enumerate(cents.tolist()):
+        if balance + amount < 0:
+            expected_rejected.append(i)
+        else:
+            balance += amount
+
+    # Act
+    rejected, reasons = book.apply(accounts, cents)
+
+    # Assert
+    assert expected_rejected == list(rejected)
+    assert all(reason == REJECTED_OVERDRAFT for reason in reasons)
+    assert [balance, 1000] == list(book.cents)
@@ -0,0 +1,169 @@
+import time
+
+import pytest
+
+import account_store
+from account_store import LatencyAccountStore, LatencyModel, PersistenceQueue, SQLiteAccountStore
+from bank_account import BankAccount
+
+def test_update_database(example_bank_account, persistence):
+    """Makes sure the money is in the database once the update is confirmed."""
+
+    # Act
+    example_bank_account.update_database(persistence).result(timeout=10)
+
+    # Assert
+    assert ("Test User", 1000.0) == persistence.store.load(example_bank_account.account_id)
+
+def test_coalesced_updates(example_bank_account, account_store):
+    """Makes sure an account updated several times is written once with its
+    latest money."""
+
+    # Arrange
+    # The first update waits up to 10s for others to join its commit
+    persistence = PersistenceQueue(account_store, max_delay_ms=10000)
+    futures = []
+
+    # Act
+    for _ in range(5):
+        example_bank_account.deposit_money(100.0)
+        futures.append(example_bank_account.update_database(persistence))
+    # Closing commits the pending accounts without waiting for the delay
+    persistence.close()
+
+    # Assert
+    assert all(future.done() and future.exception() is None for future in futures)
+    assert ("Test User", 1500.0) == account_store.load(example_bank_account.account_id)
+    assert 1 == account_store.rows
+
+def test_group_commit(bank_accounts, persistence):
+    """Makes sure many dirty accounts are written in few commits."""
+
+    # Act
+    futures = [account.update_database(persistence) for account in bank_accounts]
+    persistence.flush()
+
+    # Assert
+    assert all(future.done() for future in futures)
+    assert len(bank_accounts) == persistence.store.rows
+    assert persistence.store.commits < len(bank_accounts)
+
+def test_close_commits_pending(bank_accounts, persistence):
+    """Makes sure closing the queue writes the accounts still queued."""
+
+    # Arrange
+    futures = [account.update_database(persistence) for account in bank_accounts]
+
+    # Act
+    persistence.close()
+
+    # Assert
+    assert all(future.done() and future.exception() is None for future in futures)
+    assert all(persistence.store.load(account.account_id) is not None for account in bank_accounts)
+
+def test_stable_account_id(tmp_path):
+    """Makes sure an account is found again by its id after reopening the
+    database, whatever other accounts were created in between."""
+
+    # Arrange
+    path = str(tmp_path / "accounts.db")
+    store = SQLiteAccountStore(path)
+    store.submit(BankAccount("Test User", 1000.0, account_id="test-user")).result()
+    store.close()
+    BankAccount("Other User", 5.0)
+
+    # Act
+    store = SQLiteAccountStore(path)
+    store.submit(BankAccount("Other User", 5.0)).result()
+    loaded = store.load("test-user")
+    store.close()
+
+    # Assert
+    assert ("Test User", 1000.0) == loaded
+
+def test_failed_commit(example_bank_account, persistence):
+    """Makes sure a failed commit is reported through the future."""
+
+    # Arrange
+    persistence.store.close()
+
+    # Act
+    future = example_bank_account.update_database(persistence)
+
+    # Assert
+    with pytest.raises(Exception):
+        future.result(timeout=10)
+
+def test_store_round_trip(any_store):
+    """Makes sure every backend returns the latest money written."""
+
+    # Act
+    any_store.write([("a", "Test User", 1000.0), ("b", "Other User", 5.0)])
+    any_store.write([("a", "Test User", 250.0)])
+
+    # Assert
+    assert ("Test User", 250.0) == tuple(any_store.load("a"))
+    assert ("Other User", 5.0) == tuple(any_store.load("b"))
+    assert any_store.load("c") is None
+    assert (2, 3) == (any_store.commits, any_store.rows)
+
+def test_write_through(example_bank_account, any_store):
+    """Makes sure an update given a store is written before returning."""
+
+    # Act
+    future = example_bank_account.update_database(any_store)
+
+    # Assert
+    assert future.done()
+    assert ("Test User", 1000.0) == tuple(any_store.load(example_bank_account.account_id))
+
+def test_latency_store(memory_store):
+    """Makes sure the latency is added to every commit of the wrapped store."""
+
+    # Arrange
+    store = LatencyAccountStore(memory_store, LatencyModel(per_commit=0.05))
+
+    # Act
+    start = time.perf_counter()
+    store.write([("a", "Test User", 1000.0)])
+    elapsed = time.perf_counter() - start
+
+    # Assert
+    assert elapsed >= 0.05
+    assert ("Test User", 1000.0) == memory_store.load("a")
+    assert 1 == memory_store.commits == store.commits
+
+@pytest.mark.parametrize(
+    "latency, rows, expected_delay",
+    [
+        (LatencyModel(), 10, 0.0),
+        (LatencyModel(per_commit=0.5), 10, 0.5),
+        (LatencyModel(per_commit=0.5, per_row=0.1), 10, 1.5),
+    ],
+)
+def test_latency_model(latency, rows, expected_delay):
+    """Makes sure the simulated commit time is computed properly."""
+
+    # Act
+    delay = latency.delay(rows)
+
+    # Assert
+    assert delay == pytest.approx(expected_delay)
+
+def test_default_persistence(example_bank_account, tmp_path, monkeypatch):
+    """Makes sure updates without a target are written to the file named by
+    $BANK_DATABASE."""
+
+    # Arrange
+    path = str(tmp_path / "accounts.db")
+    monkeypatch.setenv("BANK_DATABASE", path)
+    monkeypatch.setattr(account_store, "_default_queue", None)
+
+    # Act
+    example_bank_account.update_database().result(timeout=10)
+    account_store.default_persistence().close()
+
+    # Assert
+    store = SQLiteAccountStore(path)
+    assert ("Test User", 1000.0) == tuple(store.load(example_bank_account.account_id))
+    store.close()
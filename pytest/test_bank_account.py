@@ -1,6 +1,9 @@
+import random
+import threading
+
 import pytest
 
-from bank_account import BankAccount
+from bank_account import BankAccount, transfer
 
 def test_repr(example_bank_account):
     """Makes sure the __repr__ works properly."""
@@ -85,15 +88,115 @@ def test_maybe_has_money(user, expected_output):
     # Assert
     assert user_has_money == expected_output
 
+def run_in_threads(target, num_threads: int = 8) -> None:
+    """Runs target(thread_index) in several threads and waits for all of them."""
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # A deadlock would leave the thread alive
+        thread.join(timeout=30)
+        assert not thread.is_alive(), "A thread didn't finish, possible deadlock"
+
+def test_concurrent_deposits(example_bank_account):
+    """Makes sure concurrent deposits don't lose money."""
+
+    # Act
+    run_in_threads(lambda _: [example_bank_account.deposit_money(1.0) for _ in range(1000)])
+
+    # Assert
+    assert 9000.0 == example_bank_account.money
+
+def test_concurrent_withdrawals(example_bank_account):
+    """Makes sure concurrent withdrawals never overdraw the account."""
+
+    # Arrange
+    withdrawals = []
+
+    def withdraw(_):
+        for _ in range(500):
+            try:
+                example_bank_account.get_money(1.0)
+                withdrawals.append(1.0)
+            except AssertionError:
+                pass
+
+    # Act
+    run_in_threads(withdraw)
+
+    # Assert
+    assert 0.0 == example_bank_account.money
+    assert 1000 == len(withdrawals)
+
+def test_transfer(bank_accounts):
+    """Makes sure the money is moved between accounts."""
+
+    # Arrange
+    source, destination = bank_accounts[:2]
+
+    # Act
+    transfer(source, destination, 250.0)
+
+    # Assert
+    assert 750.0 == source.money
+    assert 1250.0 == destination.money
+
+def test_transfer_without_money(bank_accounts):
+    """Makes sure a transfer without enough money changes nothing."""
+
+    # Arrange
+    source, destination = bank_accounts[:2]
+
+    # Act
+    with pytest.raises(AssertionError):
+        transfer(source, destination, 5000.0)
+
+    # Assert
+    assert 1000.0 == source.money
+    assert 1000.0 == destination.money
+
+def test_concurrent_transfers(bank_accounts):
+    """Makes sure concurrent transfers, also in opposite directions, neither
+    deadlock nor create or destroy money."""
+
+    # Arrange
+    total = sum(account.money for account in bank_accounts)
+
+    def random_transfers(seed):
+        rng = random.Random(seed)
+        for _ in range(2000):
+            source, destination = rng.sample(bank_accounts, 2)
+            try:
+                transfer(source, destination, float(rng.randint(1, 100)))
+            except AssertionError:
+                pass
+
+    # Act
+    run_in_threads(random_transfers)
+
+    # Assert
+    assert total == sum(account.money for account in bank_accounts)
+    assert all(account.money >= 0.0 for account in bank_accounts)
+
 @pytest.mark.access_to_database
-def test_time_update_database(benchmark, example_bank_account):
+def test_time_update_database(benchmark, example_bank_account, slow_persistence):
     """Tests the elapsed time when updating the database."""
     
     # Call
-    benchmark(example_bank_account.update_database)
+    benchmark(lambda: example_bank_account.update_database(slow_persistence).result())
     
-    # Since we are simulating the function, test always passes
-    assert True
+    # Assert
+    assert ("Test User", 1000.0) == slow_persistence.store.load(example_bank_account.account_id)
+
+def test_time_write_path(benchmark, example_bank_account, any_store):
+    """Tests the elapsed time of writing an account through every storage backend."""
+
+    # Call
+    benchmark(lambda: example_bank_account.update_database(any_store).result())
+
+    # Assert
+    assert ("Test User", 1000.0) == tuple(any_store.load(example_bank_account.account_id))
     
 @pytest.mark.xfail
 def test_failed():
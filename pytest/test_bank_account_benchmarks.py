@@ -0,0 +1,105 @@
+import pytest
+
+from bank_account import BankAccount
+
+# Checked against benchmark_baseline.json, see conftest
+pytestmark = pytest.mark.baseline
+
+# Operations per call of the bulk benchmarks
+BULK_OPERATIONS = 10000
+
+@pytest.fixture
+def rich_bank_account():
+    """An account with enough money to be withdrawn from millions of times."""
+
+    return BankAccount("Test User", 1e12)
+
+@pytest.fixture
+def rich_bank_accounts():
+    """Several accounts with enough money to be withdrawn from millions of times."""
+
+    return [BankAccount(f"Test User {i}", 1e12) for i in range(10)]
+
+def deposit_unvalidated(account: BankAccount, money: float) -> None:
+    """What deposit_money does without checking its argument"""
+
+    with account._lock:
+        account.money += money
+
+def get_unvalidated(account: BankAccount, money: float) -> None:
+    """What get_money does without checking its argument nor the balance"""
+
+    with account._lock:
+        account.money -= money
+
+@pytest.mark.benchmark(group="deposit_money")
+def test_time_deposit_money(benchmark, example_bank_account):
+    """Tests the elapsed time of a single deposit."""
+
+    benchmark(example_bank_account.deposit_money, 1.0)
+
+@pytest.mark.benchmark(group="deposit_money")
+def test_time_deposit_unvalidated(benchmark, example_bank_account):
+    """Tests a single deposit without the asserts, to measure their cost."""
+
+    benchmark(deposit_unvalidated, example_bank_account, 1.0)
+
+@pytest.mark.benchmark(group="get_money")
+def test_time_get_money(benchmark, rich_bank_account):
+    """Tests the elapsed time of a single withdrawal."""
+
+    benchmark(rich_bank_account.get_money, 1.0)
+
+@pytest.mark.benchmark(group="get_money")
+def test_time_get_unvalidated(benchmark, rich_bank_account):
+    """Tests a single withdrawal without the asserts, to measure their cost."""
+
+    benchmark(get_unvalidated, rich_bank_account, 1.0)
+
+def test_time_has_money(benchmark, example_bank_account):
+    """Tests the elapsed time of checking the money."""
+
+    assert benchmark(example_bank_account.has_money)
+
+def test_time_repr(benchmark, example_bank_account):
+    """Tests the elapsed time of the __repr__."""
+
+    assert "Owner: Test User - Money: 1000.0$" == benchmark(repr, example_bank_account)
+
+@pytest.mark.benchmark(group="bulk", disable_gc=True)
+def test_time_bulk_deposit_money(benchmark, bank_accounts):
+    """Tests many deposits spread over several accounts."""
+
+    def deposit_all():
+        for i in range(BULK_OPERATIONS):
+            bank_accounts[i % len(bank_accounts)].deposit_money(1.0)
+
+    benchmark(deposit_all)
+
+@pytest.mark.benchmark(group="bulk", disable_gc=True)
+def test_time_bulk_get_money(benchmark, rich_bank_accounts):
+    """Tests many withdrawals spread over several accounts."""
+
+    def get_all():
+        for i in range(BULK_OPERATIONS):
+            rich_bank_accounts[i % len(rich_bank_accounts)].get_money(1.0)
+
+    benchmark(get_all)
+
+@pytest.mark.benchmark(group="bulk", disable_gc=True)
+def test_time_bulk_has_money(benchmark, bank_accounts):
+    """Tests many money checks spread over several accounts."""
+
+    def check_all():
+        return sum(bank_accounts[i % len(bank_accounts)].has_money() for i in range(BULK_OPERATIONS))
+
+    assert BULK_OPERATIONS == benchmark(check_all)
+
+@pytest.mark.benchmark(group="bulk", disable_gc=True)
+def test_time_bulk_repr(benchmark, bank_accounts):
+    """Tests many __repr__ calls spread over several accounts."""
+
+    def repr_all():
+        return [repr(bank_accounts[i % len(bank_accounts)]) for i in range(BULK_OPERATIONS)]
+
+    assert BULK_OPERATIONS == len(benchmark(repr_all))
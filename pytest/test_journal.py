@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from account_book import AccountBook
+from journal import Journal
+
+@pytest.fixture
+def journal(tmp_path):
+    """A Journal with small segments in a temporary directory."""
+
+    journal = Journal(str(tmp_path / "journal"), segment_records=100)
+    yield journal
+    journal.close()
+
+@pytest.fixture
+def journal_account_book():
+    """An AccountBook of ten accounts."""
+
+    return AccountBook([f"User {i}" for i in range(10)], [100.0] * 10)
+
+def random_batch(rng, size: int = 250):
+    """Random deposits and withdrawals over ten accounts."""
+
+    return rng.integers(0, 10, size), rng.integers(-5000, 5000, size)
+
+def test_recover(journal, journal_account_book):
+    """Makes sure the book is rebuilt from a snapshot and the records after it."""
+
+    # Arrange
+    rng = np.random.default_rng(0)
+    journal.apply(journal_account_book, *random_batch(rng))
+    journal.snapshot(journal_account_book)
+    journal.apply(journal_account_book, *random_batch(rng))
+
+    # Act
+    recovered = journal.recover()
+
+    # Assert
+    assert list(journal_account_book.names) == list(recovered.names)
+    assert list(journal_account_book.cents) == list(recovered.cents)
+
+def test_reopen(journal, journal_account_book, tmp_path):
+    """Makes sure a reopened journal continues where the previous one stopped."""
+
+    # Arrange
+    rng = np.random.default_rng(1)
+    journal.snapshot(journal_account_book)
+    journal.apply(journal_account_book, *random_batch(rng))
+    journal.close()
+
+    # Act
+    reopened = Journal(journal.directory, segment_records=100)
+    reopened.apply(journal_account_book, *random_batch(rng))
+    recovered = reopened.recover()
+    reopened.close()
+
+    # Assert
+    assert list(journal_account_book.cents) == list(recovered.cents)
+
+def test_partial_record(journal, journal_account_book):
+    """Makes sure a record torn by a crash is dropped when reopening."""
+
+    # Arrange
+    journal.snapshot(journal_account_book)
+    journal.append(np.array([0]), np.array([500]))
+    journal.close()
+    _, path = journal.segments()[-1]
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    # Act
+    reopened = Journal(journal.directory, segment_records=100)
+    recovered = reopened.recover()
+    reopened.close()
+
+    # Assert
+    assert 1 == reopened.next_record
+    assert 10500 == recovered.cents[0]
+
+def test_failed_append(journal, journal_account_book, monkeypatch):
+    """Makes sure a batch that can't be journaled changes neither the book nor
+    the journal."""
+
+    # Arrange
+    rng = np.random.default_rng(3)
+    journal.snapshot(journal_account_book)
+    journal.apply(journal_account_book, *random_batch(rng))
+    segments_before = journal.segments()
+    cents_before = journal_account_book.cents.copy()
+    next_record = journal.next_record
+
+    def failing_sync():
+        raise OSError("Disk full")
+
+    # Act
+    monkeypatch.setattr(journal, "_sync", failing_sync)
+    with pytest.raises(OSError):
+        journal.apply(journal_account_book, *random_batch(rng))
+    monkeypatch.undo()
+
+    # Assert
+    assert list(cents_before) == list(journal_account_book.cents)
+    assert next_record == journal.next_record
+    assert segments_before == journal.segments()
+    assert list(cents_before) == list(journal.recover().cents)
+    journal.apply(journal_account_book, *random_batch(rng))
+    assert list(journal_account_book.cents) == list(journal.recover().cents)
+
+def test_compact(journal, journal_account_book):
+    """Makes sure compaction deletes what the latest snapshot made useless."""
+
+    # Arrange
+    rng = np.random.default_rng(2)
+    journal.snapshot(journal_account_book)
+    for _ in range(4):
+        journal.apply(journal_account_book, *random_batch(rng))
+    journal.snapshot(journal_account_book)
+    journal.apply(journal_account_book, *random_batch(rng))
+    segments_before = len(journal.segments())
+
+    # Act
+    deleted = journal.compact()
+
+    # Assert
+    assert 1 == len(journal.snapshots())
+    assert len(journal.segments()) < segments_before
+    assert deleted == segments_before - len(journal.segments()) + 1
+    assert list(journal_account_book.cents) == list(journal.recover().cents)